@@ -0,0 +1,145 @@
+import asyncio, functools, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+from board import Board
+from solver import solve, count_solutions, SearchControl, SearchCancelled
+from pool import generate_puzzle
+
+# Asyncio facade over the solver and generator for services running an event loop:
+#
+#   async with PuzzleService(workers=4) as service:
+#       entry = await service.generate_puzzle(16, 55, timeout=30)
+#       board = Board.from_grid(entry["grid"])
+#       unique = await service.solution_is_unique(board)
+#
+# The work runs in a process pool, so the loop never waits on the CPU. At most max_concurrency
+# requests run at once; further callers wait for a slot, which is the backpressure, and past
+# max_waiting waiting callers new requests fail at once with ServiceBusy so a busy service can
+# shed load. Cancelling the awaiting task stops the search in its worker at the next node, and
+# a timeout raises SearchTimeout from the solver module.
+
+# Shared with the workers through the pool initializer: one flag per slot, set to stop its search
+_cancel_flags = None
+
+
+class ServiceBusy(Exception):
+    """Raised instead of waiting when max_waiting requests are already waiting for a slot."""
+
+
+class _SlotControl(SearchControl):
+    """Worker-side control that also stops once the slot's cancel flag is set."""
+
+    def __init__(self, slot, timeout):
+        super().__init__(timeout)
+        self.slot = slot
+
+    def tick(self):
+        if _cancel_flags[self.slot]:
+            raise SearchCancelled()
+        super().tick()
+
+
+def _init_worker(cancel_flags):
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def _run(slot, timeout, function, args): # Runs function in a worker under the slot's control
+    return function(*args, control=_SlotControl(slot, timeout))
+
+
+def _solve_grid(grid, engine, control): # Returns the solved grid, or None if there is no solution
+    board = Board.from_grid(grid)
+    if board.conflicts or not solve(board, engine=engine, control=control):
+        return None
+    return board.grid.to_list()
+
+
+def _count_grid(grid, limit, engine, control):
+    board = Board.from_grid(grid)
+    if board.conflicts:
+        return 0
+    return count_solutions(board, limit=limit, engine=engine, control=control)
+
+
+class PuzzleService:
+    """Runs solver and generator calls for an asyncio event loop on a managed process pool.
+    Create it once and share it; close() or an async with block stops the workers."""
+
+    def __init__(self, workers=None, max_concurrency=None, max_waiting=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.workers
+        self.max_waiting = max_waiting # None lets any number of callers wait
+        context = multiprocessing.get_context("spawn")
+        self.cancel_flags = context.RawArray("b", self.max_concurrency)
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker, initargs=(self.cancel_flags,))
+        self.free_slots = asyncio.Queue()
+        for slot in range(self.max_concurrency):
+            self.free_slots.put_nowait(slot)
+        self.waiting = 0
+
+    async def solve(self, board, engine="backtrack", timeout=None):
+        """Solves board in a worker and fills it in, like solver.solve. Returns True if solved,
+        False if it has no solution. The board must not be changed while this runs."""
+        solution = await self._submit(timeout, _solve_grid, board.grid.to_list(), engine)
+        if solution is None:
+            return False
+        for r, row in enumerate(solution):
+            for c, num in enumerate(row):
+                if board.cells[r * board.size + c] < 0:
+                    board.set_value(r, c, num)
+        return True
+
+    async def count_solutions(self, board, limit=2, engine="backtrack", timeout=None):
+        """Counts the solutions of board up to limit, like solver.count_solutions."""
+        return await self._submit(timeout, _count_grid, board.grid.to_list(), limit, engine)
+
+    async def solution_is_unique(self, board, engine="backtrack", timeout=None):
+        board.num_solutions = await self.count_solutions(board, 2, engine, timeout)
+        return board.num_solutions == 1
+
+    async def generate_puzzle(self, size, difficulty, timeout=None):
+        """Generates a uniquely solvable puzzle. Returns the same dict as pool.generate_puzzle,
+        with the puzzle and solution grids, rating and generation statistics."""
+        return await self._submit(timeout, generate_puzzle, size, difficulty)
+
+    async def _submit(self, timeout, function, *args): # Runs function(*args, control=...) in a worker once a slot is free
+        if self.max_waiting is not None and self.free_slots.empty() and self.waiting >= self.max_waiting:
+            raise ServiceBusy(f"{self.waiting} requests are already waiting")
+        self.waiting += 1
+        try:
+            slot = await self.free_slots.get()
+        finally:
+            self.waiting -= 1
+
+        self.cancel_flags[slot] = 0
+        deferred = False
+        try:
+            # Inside the try so that a broken or shut down pool failing the submit still frees the slot
+            future = asyncio.wrap_future(self.executor.submit(_run, slot, timeout, function, args))
+            # Shielded so that cancelling the caller does not abandon the worker still using the slot
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.done():
+                self.cancel_flags[slot] = 1
+                future.add_done_callback(functools.partial(self._release_cancelled, slot))
+                deferred = True
+            raise
+        finally:
+            if not deferred:
+                self.free_slots.put_nowait(slot)
+
+    def _release_cancelled(self, slot, future): # Frees the slot of a cancelled request once its worker has stopped
+        if not future.cancelled():
+            future.exception() # Retrieved so the expected SearchCancelled is not reported as unhandled
+        self.free_slots.put_nowait(slot)
+
+    async def close(self): # Stops running searches and shuts the workers down without blocking the loop
+        for slot in range(self.max_concurrency):
+            self.cancel_flags[slot] = 1
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.executor.shutdown, cancel_futures=True))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
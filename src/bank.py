@@ -0,0 +1,172 @@
+import mmap, random, struct, sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from rating import rating_score
+
+# Puzzle bank file layout, all little-endian:
+#   header  magic, version, board size, bits per cell, record size, record count, index offset
+#   records fixed-size, one per puzzle:
+#             givens bitmap (one bit per cell, row-major), packed solution (4 bits per
+#             cell up to 16x16, 8 bits beyond), difficulty score (uint16)
+#   index   table of (score, first position, count) sorted by score, followed by the
+#           uint32 record ids grouped in the same order
+# Because ids are grouped by ascending score, every difficulty band maps to one contiguous
+# run of the id list, so a random puzzle in a band is found without scanning anything.
+
+BANK_MAGIC = b"HXDB"
+BANK_VERSION = 1
+HEADER = struct.Struct("<4sHHHHIQ")
+SCORE = struct.Struct("<H")
+TABLE_ENTRY = struct.Struct("<HII")
+
+
+def _record_layout(size): # Returns (bits per cell, givens bytes, solution bytes, record size)
+    cells = size * size
+    bits = 4 if size <= 16 else 8
+    givens_bytes = (cells + 7) // 8
+    solution_bytes = (cells * bits + 7) // 8
+    return bits, givens_bytes, solution_bytes, givens_bytes + solution_bytes + SCORE.size
+
+
+class BankWriter:
+    """Streams puzzles into a bank file. Records are written as they are added; the difficulty
+    index is written by close(), so use it as a context manager."""
+
+    def __init__(self, path, size):
+        self.path = Path(path)
+        self.size = size
+        self.bits, self.givens_bytes, self.solution_bytes, self.record_size = _record_layout(size)
+        self.count = 0
+        self.ids_by_score = {}
+        self.file = self.path.open("wb")
+        self.file.write(HEADER.pack(BANK_MAGIC, BANK_VERSION, size, self.bits, self.record_size, 0, 0))
+
+    def add(self, givens, solution, score): # Appends one puzzle; givens uses None for blanks
+        n = self.size
+        cells = [solution[r][c] for r in range(n) for c in range(n)]
+        given_bits = bytearray(self.givens_bytes)
+        for i in range(n * n):
+            if givens[i // n][i % n] is not None:
+                given_bits[i >> 3] |= 0x80 >> (i & 7)
+        if self.bits == 4:
+            if len(cells) % 2:
+                cells.append(0)
+            packed = bytes((cells[k] << 4) | cells[k + 1] for k in range(0, len(cells), 2))
+        else:
+            packed = bytes(cells)
+        self.file.write(given_bits)
+        self.file.write(packed)
+        self.file.write(SCORE.pack(score))
+        self.ids_by_score.setdefault(score, array("I")).append(self.count)
+        self.count += 1
+
+    def add_board(self, puzzle, score=None): # Appends a puzzle Board carrying its solution_grid, scored by its difficulty rating by default
+        if score is None:
+            score = rating_score(puzzle)
+        self.add(puzzle.grid, puzzle.solution_grid, score)
+
+    def close(self): # Writes the difficulty index and the final header
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        position = 0
+        scores = sorted(self.ids_by_score)
+        for score in scores:
+            count = len(self.ids_by_score[score])
+            self.file.write(TABLE_ENTRY.pack(score, position, count))
+            position += count
+        for score in scores:
+            ids = self.ids_by_score[score]
+            if sys.byteorder == "big":
+                ids.byteswap()
+            ids.tofile(self.file)
+        self.file.seek(0)
+        self.file.write(HEADER.pack(BANK_MAGIC, BANK_VERSION, self.size, self.bits, self.record_size, self.count, index_offset))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PuzzleBank:
+    """Read-only view of a bank file through mmap; only the records that are read are paged in."""
+
+    def __init__(self, path):
+        self.file = Path(path).open("rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, bits, record_size, count, index_offset = HEADER.unpack_from(self.data, 0)
+        if magic != BANK_MAGIC or version != BANK_VERSION:
+            raise ValueError(f"{path} is not a version {BANK_VERSION} puzzle bank")
+        self.size = size
+        self.count = count
+        self.bits, self.givens_bytes, self.solution_bytes, self.record_size = _record_layout(size)
+        if (bits, record_size) != (self.bits, self.record_size):
+            raise ValueError(f"{path} has an unexpected record layout")
+
+        # The score table is tiny, so it is decoded up front; the id list stays in the map
+        self.scores = []
+        self.starts = []
+        offset = index_offset
+        position = 0
+        while position < count:
+            score, start, entries = TABLE_ENTRY.unpack_from(self.data, offset)
+            self.scores.append(score)
+            self.starts.append(start)
+            position = start + entries
+            offset += TABLE_ENTRY.size
+        self.starts.append(count)
+        self.ids_offset = offset
+
+    def __len__(self):
+        return self.count
+
+    def record(self, record_id): # Returns (givens grid with None blanks, solution grid, score)
+        n = self.size
+        offset = HEADER.size + record_id * self.record_size
+        given_bits = self.data[offset:offset + self.givens_bytes]
+        offset += self.givens_bytes
+        packed = self.data[offset:offset + self.solution_bytes]
+        offset += self.solution_bytes
+        (score,) = SCORE.unpack_from(self.data, offset)
+        if self.bits == 4:
+            cells = []
+            for byte in packed:
+                cells.append(byte >> 4)
+                cells.append(byte & 0x0F)
+        else:
+            cells = list(packed)
+        solution = [cells[r * n:(r + 1) * n] for r in range(n)]
+        givens = [[solution[r][c] if given_bits[(r * n + c) >> 3] & (0x80 >> ((r * n + c) & 7)) else None
+                   for c in range(n)] for r in range(n)]
+        return givens, solution, score
+
+    def band(self, low, high): # Returns the (start, end) run of the id list holding scores low..high
+        first = bisect_left(self.scores, low)
+        last = bisect_right(self.scores, high)
+        return self.starts[first], self.starts[last]
+
+    def count_in_band(self, low, high):
+        start, end = self.band(low, high)
+        return end - start
+
+    def random_in_band(self, low, high): # Returns a random record with a score in low..high, or None
+        start, end = self.band(low, high)
+        if start == end:
+            return None
+        position = random.randrange(start, end)
+        (record_id,) = struct.unpack_from("<I", self.data, self.ids_offset + 4 * position)
+        return self.record(record_id)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,217 @@
+import argparse, json, platform, random, sys, time
+from pathlib import Path
+from board import Board
+from solver import solve, solution_is_unique, get_unique_solution, SolveStats, ENGINES
+from cli import puzzle_from_line, line_from_grid
+from parallel import ParallelSearch
+
+# Benchmark suite for the solver and generator. Puzzles come from the checked-in corpora in
+# bench/corpus, one "puzzle<TAB>solution" line each, so every run measures the same work:
+#
+#   python3 src/bench.py run --save before.json
+#   python3 src/bench.py run --compare before.json
+#   python3 src/bench.py corpus  # only to rebuild the corpora after changing their spec
+#
+# Each benchmark reports wall time, search node and backtrack percentiles, and --compare flags any
+# benchmark whose median or mean time grew by more than the threshold against an earlier run.
+
+CORPUS_DIR = Path(__file__).resolve().parent.parent / "bench" / "corpus"
+CORPUS_SIZE = 16
+CORPUS_LEVELS = (30, 45, 55, 62) # Percentages of empty cells, one corpus each
+CORPUS_COUNT = 20
+CORPUS_SEED = 1601
+GENERATE_RUNS = 50 # Boards generated per generate_random benchmark
+SEARCH_FILL_SIZE = 25 # Board size of the search-filled generate_random benchmark, whose slow runs restarts cut short
+
+
+def corpus_path(level):
+    return CORPUS_DIR / f"{CORPUS_SIZE}x{CORPUS_SIZE}-{level}.txt"
+
+
+def build_corpora(): # Regenerates every corpus file from CORPUS_SEED
+    CORPUS_DIR.mkdir(parents=True, exist_ok=True)
+    for level in CORPUS_LEVELS:
+        random.seed(CORPUS_SEED + level)
+        with corpus_path(level).open("w") as f:
+            for _ in range(CORPUS_COUNT):
+                board = Board(CORPUS_SIZE)
+                board.generate_random()
+                puzzle = get_unique_solution(board, level)
+                f.write(line_from_grid(puzzle.grid) + "\t" + line_from_grid(board.solution_grid) + "\n")
+        print(f"wrote {corpus_path(level)}")
+
+
+def load_corpus(level): # Returns [(puzzle line, solution line)] for a corpus
+    with corpus_path(level).open() as f:
+        return [tuple(line.split()) for line in f if line.strip()]
+
+
+def percentile(ordered, fraction): # Nearest-rank percentile of a sorted list
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(times, nodes, backtracks): # Summary statistics for one benchmark, times in milliseconds
+    times = sorted(t * 1000 for t in times)
+    nodes = sorted(nodes)
+    backtracks = sorted(backtracks)
+    return {
+        "runs": len(times),
+        "total_ms": sum(times),
+        "mean_ms": sum(times) / len(times),
+        "p50_ms": percentile(times, 0.5),
+        "p90_ms": percentile(times, 0.9),
+        "p99_ms": percentile(times, 0.99),
+        "max_ms": times[-1],
+        "mean_nodes": sum(nodes) / len(nodes),
+        "p50_nodes": percentile(nodes, 0.5),
+        "max_nodes": nodes[-1],
+        "mean_backtracks": sum(backtracks) / len(backtracks),
+        "max_backtracks": backtracks[-1],
+    }
+
+
+def measure(cases, function, repeat):
+    """Runs function(case, stats) for every case, keeping the fastest of repeat runs per case.
+    Returns (times, nodes, backtracks) lists."""
+    times = []
+    nodes = []
+    backtracks = []
+    for case in cases:
+        best = None
+        for _ in range(repeat):
+            stats = SolveStats()
+            started = time.perf_counter()
+            function(case, stats)
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best:
+                best = elapsed
+        times.append(best)
+        nodes.append(stats.nodes)
+        backtracks.append(stats.backtracks)
+    return times, nodes, backtracks
+
+
+def run_benchmarks(engine, repeat, only=None, parallel=None): # Returns {benchmark name: summary}
+    results = {}
+
+    def record(name, cases, function):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            return
+        results[name] = summarize(*measure(cases, function, repeat))
+        print(format_row(name, results[name]), flush=True)
+
+    def run_solve(case, stats):
+        board = puzzle_from_line(case[0])
+        if not solve(board, engine=engine, stats=stats) or line_from_grid(board.grid) != case[1]:
+            raise AssertionError(f"solve returned a wrong answer for {case[0]}")
+
+    def run_unique(case, stats):
+        if not solution_is_unique(puzzle_from_line(case[0]), engine=engine, stats=stats, parallel=parallel):
+            raise AssertionError(f"corpus puzzle is not unique: {case[0]}")
+
+    def run_generate(case, stats):
+        random.seed(case)
+        Board(CORPUS_SIZE).generate_random(stats=stats)
+
+    def run_search_fill(case, stats):
+        random.seed(case)
+        Board(SEARCH_FILL_SIZE).generate_random(engine=engine, method="search", stats=stats)
+
+    def run_dig(level):
+        def run(case, stats):
+            random.seed(case[1])
+            solved = puzzle_from_line(case[1])
+            get_unique_solution(solved, level, engine=engine, stats=stats, parallel=parallel)
+        return run
+
+    Board(CORPUS_SIZE) # Builds the cached board geometry outside of any measurement
+    print(format_header())
+    record(f"generate_random/{CORPUS_SIZE}x{CORPUS_SIZE}", range(GENERATE_RUNS), run_generate)
+    record(f"generate_random/{SEARCH_FILL_SIZE}x{SEARCH_FILL_SIZE}-search", range(GENERATE_RUNS), run_search_fill)
+    for level in CORPUS_LEVELS:
+        corpus = load_corpus(level)
+        tag = f"{CORPUS_SIZE}x{CORPUS_SIZE}-{level}"
+        record(f"solve/{tag}", corpus, run_solve)
+        record(f"solution_is_unique/{tag}", corpus, run_unique)
+        record(f"get_unique_solution/{tag}", corpus, run_dig(level))
+    return results
+
+
+def format_header():
+    return f"{'benchmark':40} {'runs':>5} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'p50 nodes':>10}"
+
+
+def format_row(name, s):
+    return (f"{name:40} {s['runs']:5} {s['mean_ms']:9.2f} {s['p50_ms']:9.2f} {s['p90_ms']:9.2f} "
+            f"{s['p99_ms']:9.2f} {s['max_ms']:9.2f} {s['p50_nodes']:10}")
+
+
+def compare(previous, results, threshold):
+    """Prints the change of every benchmark against a previous run and returns the names of
+    those whose median or mean time grew by more than threshold (a fraction)."""
+    regressions = []
+    print(f"\n{'benchmark':40} {'p50 before':>11} {'p50 now':>9} {'change':>8} {'mean change':>12} {'nodes change':>13}")
+    for name, now in results.items():
+        before = previous.get(name)
+        if before is None:
+            print(f"{name:40} {'new':>11}")
+            continue
+        p50_change = now["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        mean_change = now["mean_ms"] / before["mean_ms"] - 1 if before["mean_ms"] else 0.0
+        nodes_change = now["mean_nodes"] / before["mean_nodes"] - 1 if before["mean_nodes"] else 0.0
+        flag = ""
+        if p50_change > threshold or mean_change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:40} {before['p50_ms']:11.2f} {now['p50_ms']:9.2f} {p50_change:+8.1%} {mean_change:+12.1%} {nodes_change:+13.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench.py", description="Benchmark the solver and generator on fixed puzzle corpora.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--engine", choices=ENGINES, default="backtrack")
+    run.add_argument("--repeat", type=int, default=1, help="runs per case, keeping the fastest")
+    run.add_argument("--only", nargs="*", help="run only benchmarks whose name starts with one of these")
+    run.add_argument("--workers", type=int, default=0, help="run uniqueness checks on a ParallelSearch with this many processes")
+    run.add_argument("--save", help="write the results to this JSON file")
+    run.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    run.add_argument("--threshold", type=float, default=0.15, help="slowdown that counts as a regression (default 0.15)")
+    commands.add_parser("corpus", help="regenerate the checked-in corpora")
+    args = parser.parse_args(argv)
+
+    if args.command == "corpus":
+        build_corpora()
+        return 0
+
+    parallel = ParallelSearch(args.workers) if args.workers > 0 else None
+    try:
+        results = run_benchmarks(args.engine, max(args.repeat, 1), args.only, parallel)
+    finally:
+        if parallel is not None:
+            parallel.close()
+    if args.save:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "engine": args.engine,
+            "repeat": args.repeat,
+            "workers": args.workers,
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+        regressions = compare(previous, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,458 @@
 import math, random
-from solver import solve, check_num_is_valid
+from array import array
+from solver import solve, check_num_is_valid, num_to_char, FILL_TECHNIQUES, SYMBOLS, _phase
+
+_GEOMETRY_CACHE = {}
+
+# Storage backends accepted by make_board
+BOARD_BACKENDS = ("python", "numpy")
+
+# Ways Board.generate_random can build a solved grid
+GENERATION_METHODS = ("pattern", "search")
+
+# Value stored in Board.cells for an empty cell
+EMPTY = -1
+
+# Kinds of undo records kept on Board.trail
+_UNDO_FILL = 0
+_UNDO_CANDIDATES = 1
+_UNDO_SET = 2
+
+def board_geometry(size): # Returns (peers, cell_units, units, segments) for flat cell indices, shared by all boards of a size
+    geometry = _GEOMETRY_CACHE.get(size)
+    if geometry is None:
+        box_width = math.isqrt(size)
+        cell_units = []
+        for r in range(size):
+            for c in range(size):
+                cell_units.append((r, c, (r // box_width) * box_width + (c // box_width)))
+
+        # Units are the rows, then the columns, then the boxes, each in ascending cell order
+        units = [tuple(r * size + c for c in range(size)) for r in range(size)]
+        units += [tuple(r * size + c for r in range(size)) for c in range(size)]
+        for b in range(size):
+            top, left = (b // box_width) * box_width, (b % box_width) * box_width
+            units.append(tuple(r * size + c for r in range(top, top + box_width) for c in range(left, left + box_width)))
+
+        # A cell's peers are the other cells of its row, column and box
+        peers = []
+        for i, (r, c, b) in enumerate(cell_units):
+            cells = set(units[r])
+            cells.update(units[size + c])
+            cells.update(units[2 * size + b])
+            cells.discard(i)
+            peers.append(tuple(sorted(cells)))
+
+        # Segments are the intersections of a row or column with a box, stored as
+        # (segment cells, rest of the line, rest of the box) for locked candidates
+        segments = []
+        for kind in range(2):
+            for line in range(size):
+                line_cells = units[kind * size + line]
+                for b in sorted({cell_units[i][2] for i in line_cells}):
+                    box_cells = units[2 * size + b]
+                    box_set = set(box_cells)
+                    seg = tuple(i for i in line_cells if i in box_set)
+                    segments.append((
+                        seg,
+                        tuple(i for i in line_cells if i not in seg),
+                        tuple(i for i in box_cells if i not in seg),
+                    ))
+        geometry = (tuple(peers), tuple(cell_units), tuple(units), tuple(segments))
+        _GEOMETRY_CACHE[size] = geometry
+    return geometry
+
+def make_board(size, backend="python"): # Creates an empty board using the chosen storage backend
+    if backend == "numpy":
+        from board_np import NumpyBoard
+        return NumpyBoard(size)
+    if backend != "python":
+        raise ValueError(f"Unknown board backend {backend!r}, expected one of {BOARD_BACKENDS}")
+    return Board(size)
+
+class GridRow:
+    """Live view of one board row, so grid[r][c] reads and writes the flat cell array."""
+    __slots__ = ("cells", "start", "size")
+
+    def __init__(self, cells, start, size):
+        self.cells = cells
+        self.start = start
+        self.size = size
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(self)[col]
+        val = self.cells[self.start + range(self.size)[col]]
+        return None if val == EMPTY else val
+
+    def __setitem__(self, col, num): # Writes the cell only, like assigning into a nested list grid
+        self.cells[self.start + range(self.size)[col]] = EMPTY if num is None else num
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for val in self.cells[self.start:self.start + self.size]:
+            yield None if val == EMPTY else val
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, GridRow)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None # Mutable like the list rows it replaces
+
+    def copy(self):
+        return list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class GridView:
+    """Nested-list style view of Board.cells for code that indexes grid[r][c]. Use to_list()
+    to get plain nested lists with None for blanks, e.g. for JSON."""
+    __slots__ = ("cells", "size")
+
+    def __init__(self, cells, size):
+        self.cells = cells
+        self.size = size
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [GridRow(self.cells, r * self.size, self.size) for r in range(self.size)[row]]
+        return GridRow(self.cells, range(self.size)[row] * self.size, self.size)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for row in range(self.size):
+            yield GridRow(self.cells, row * self.size, self.size)
+
+    def __eq__(self, other):
+        if isinstance(other, GridView):
+            return self.to_list() == other.to_list()
+        if not isinstance(other, list):
+            return NotImplemented
+        return self.to_list() == other
+
+    __hash__ = None
+
+    def to_list(self):
+        cells = [None if val == EMPTY else val for val in self.cells]
+        return [cells[r * self.size:(r + 1) * self.size] for r in range(self.size)]
+
+    def __repr__(self):
+        return repr(self.to_list())
+
 
 class Board:
+    __slots__ = ("size", "box_width", "full_mask", "cells", "rows_mask", "cols_mask", "boxes_mask",
+                 "unit_counts", "filled", "conflicts", "peers", "cell_units", "units", "segments",
+                 "cand", "empty", "buckets", "trail", "num_solutions", "solution_grid")
+
     def __init__(self, size):
+        if math.isqrt(size) ** 2 != size or not 1 <= size <= len(SYMBOLS):
+            raise ValueError(f"Board size must be a perfect square up to {len(SYMBOLS)}, got {size}")
         self.size = size
-        self.grid = [[None for row in range(size)] for col in range(size)]
-        self.rows = [set() for _ in range(size)]
-        self.cols = [set() for _ in range(size)]
-        self.boxes = [set() for _ in range(size)]
-        self.valid_nums = [i for i in range(size)]
-        self.valid_chars = [format(i, 'X') for i in range(size)]
+        # Cell values by flat index row * size + col, EMPTY for blanks; grid gives a grid[r][c] view
+        self.cells = array("b", [EMPTY]) * (size * size)
         self.num_solutions = None
 
         # Store the solution board after generation
         self.solution_grid = None
 
         # Bitmask representations for fast candidate computation
-        self.box_width = int(math.sqrt(size))
+        self.box_width = math.isqrt(size)
         self.full_mask = (1 << size) - 1
         self.rows_mask = [0 for _ in range(size)]
         self.cols_mask = [0 for _ in range(size)]
         self.boxes_mask = [0 for _ in range(size)]
 
+        # Running completion state: unit_counts[unit * size + num] counts num in each row, then
+        # column, then box; filled counts filled cells and conflicts counts duplicate placements
+        self.unit_counts = array("B", bytes(3 * size * size))
+        self.filled = 0
+        self.conflicts = 0
+
+        # Incrementally maintained candidate table, indexed by flat cell index row * size + col.
+        # cand holds the candidate mask of each empty cell (0 for filled cells), empty holds the
+        # empty cells, and buckets[k] holds the empty cells with exactly k candidates (MRV).
+        self.peers, self.cell_units, self.units, self.segments = board_geometry(size)
+        self.cand = [self.full_mask] * (size * size)
+        self.empty = set(range(size * size))
+        self.buckets = [set() for _ in range(size + 1)]
+        self.buckets[size] = set(range(size * size))
+
+        # Undo log of mutations while a checkpoint is open, None when not recording
+        self.trail = None
+
+    @classmethod
+    def from_grid(cls, grid, solution_grid=None): # Builds a board from a nested list grid, e.g. loaded from JSON
+        board = cls(len(grid))
+        board.grid = grid
+        board.solution_grid = [list(row) for row in solution_grid] if solution_grid is not None else None
+        board.rebuild_masks_from_grid()
+        return board
+
+    @property
+    def grid(self): # Live grid[r][c] view of the cells, None for blanks
+        return GridView(self.cells, self.size)
+
+    @grid.setter
+    def grid(self, grid): # Loads cell values from nested lists without updating any tracking; call rebuild_masks_from_grid after
+        self.cells = array("b", [EMPTY if val is None else val for row in grid for val in row])
+
+    @property
+    def valid_nums(self):
+        return list(range(self.size))
+
+    @property
+    def valid_chars(self):
+        return [num_to_char(i) for i in range(self.size)]
+
     def display(self): # Displays the board in a readable format
         for row in self.grid:
-            print(" ".join("_" if num == None else format(num, 'X') for num in row))
+            print(" ".join("_" if num == None else num_to_char(num) for num in row))
 
-    def set_value(self, row, col, num): # Sets a value in the board, updating tracking sets, no validation
-        old = self.grid[row][col]
+    def set_value(self, row, col, num): # Sets a value in the board, updating tracking masks, no validation
+        i = row * self.size + col
+        old = self.cells[i]
+        if old == EMPTY:
+            old = None
+        if old == num:
+            return
+        box_index = self.cell_units[i][2]
         if old is not None:
-            self.rows[row].remove(old)
-            self.cols[col].remove(old)
-            box_index = (row // self.box_width) * self.box_width + (col // self.box_width)
-            self.boxes[box_index].remove(old)
-            bit = 1 << old
-            self.rows_mask[row] &= ~bit
-            self.cols_mask[col] &= ~bit
-            self.boxes_mask[box_index] &= ~bit
-        self.grid[row][col] = num
-
+            if self.trail is not None:
+                self.trail.append((_UNDO_SET, row, col, old))
+            self._remove_from_units(row, col, box_index, old)
+        self.cells[i] = EMPTY if num is None else num
         if num is not None:
-            self.rows[row].add(num)
-            self.cols[col].add(num)
-            box_index = (row // self.box_width) * self.box_width + (col // self.box_width)
-            self.boxes[box_index].add(num)
-            bit = 1 << num
+            self._add_to_units(row, col, box_index, num)
+
+        # Keep the candidate table in step, touching only this cell and its peers
+        if old is None:
+            self._fill_cell(i, num)
+        else:
+            if num is None:
+                self._open_cell(i)
+            self._refresh_peers(i)
+
+    def _add_to_units(self, row, col, box_index, num): # Records num in the unit counts and masks
+        n = self.size
+        counts = self.unit_counts
+        self.filled += 1
+        bit = 1 << num
+        k = row * n + num
+        if counts[k]:
+            self.conflicts += 1
+        else:
             self.rows_mask[row] |= bit
+        counts[k] += 1
+        k = (n + col) * n + num
+        if counts[k]:
+            self.conflicts += 1
+        else:
             self.cols_mask[col] |= bit
+        counts[k] += 1
+        k = (2 * n + box_index) * n + num
+        if counts[k]:
+            self.conflicts += 1
+        else:
             self.boxes_mask[box_index] |= bit
+        counts[k] += 1
+
+    def _remove_from_units(self, row, col, box_index, num): # Removes num from the unit counts, and from the masks once no copy is left
+        n = self.size
+        counts = self.unit_counts
+        self.filled -= 1
+        bit = 1 << num
+        k = row * n + num
+        counts[k] -= 1
+        if counts[k]:
+            self.conflicts -= 1
+        else:
+            self.rows_mask[row] &= ~bit
+        k = (n + col) * n + num
+        counts[k] -= 1
+        if counts[k]:
+            self.conflicts -= 1
+        else:
+            self.cols_mask[col] &= ~bit
+        k = (2 * n + box_index) * n + num
+        counts[k] -= 1
+        if counts[k]:
+            self.conflicts -= 1
+        else:
+            self.boxes_mask[box_index] &= ~bit
+
+    def _reset_units(self): # Clears the unit counts and masks
+        n = self.size
+        self.rows_mask = [0] * n
+        self.cols_mask = [0] * n
+        self.boxes_mask = [0] * n
+        self.unit_counts = array("B", bytes(3 * n * n))
+        self.filled = 0
+        self.conflicts = 0
+
+    def _fill_cell(self, i, num): # Removes a newly filled cell from the empty index and num from its peers
+        cand = self.cand
+        buckets = self.buckets
+        self.empty.discard(i)
+        saved = cand[i]
+        buckets[saved.bit_count()].discard(i)
+        cand[i] = 0
+        bit = 1 << num
+        cleared = []
+        for p in self.peers[i]:
+            mask = cand[p]
+            if mask & bit:
+                buckets[mask.bit_count()].discard(p)
+                mask ^= bit
+                cand[p] = mask
+                buckets[mask.bit_count()].add(p)
+                cleared.append(p)
+        if self.trail is not None:
+            self.trail.append((_UNDO_FILL, i, saved, cleared))
+
+    def checkpoint(self): # Starts recording mutations if needed and returns a mark to roll back to
+        if self.trail is None:
+            self.trail = []
+        return len(self.trail)
+
+    def rollback(self, mark): # Undoes every mutation recorded since mark, newest first
+        trail = self.trail
+        cand = self.cand
+        buckets = self.buckets
+        while len(trail) > mark:
+            record = trail.pop()
+            kind = record[0]
+            if kind == _UNDO_FILL:
+                # Exact inverse of _fill_cell: empty the cell and give the digit back to the peers it was taken from
+                _, i, saved, cleared = record
+                row, col, box_index = self.cell_units[i]
+                num = self.cells[i]
+                self._remove_from_units(row, col, box_index, num)
+                self.cells[i] = EMPTY
+                cand[i] = saved
+                self.empty.add(i)
+                buckets[saved.bit_count()].add(i)
+                bit = 1 << num
+                for p in cleared:
+                    mask = cand[p]
+                    buckets[mask.bit_count()].discard(p)
+                    mask |= bit
+                    cand[p] = mask
+                    buckets[mask.bit_count()].add(p)
+            elif kind == _UNDO_CANDIDATES:
+                _, i, old_mask = record
+                buckets[cand[i].bit_count()].discard(i)
+                cand[i] = old_mask
+                buckets[old_mask.bit_count()].add(i)
+            else:
+                # Overwrites and clears are undone through set_value without recording them again
+                _, row, col, old = record
+                self.trail = None
+                self.set_value(row, col, old)
+                self.trail = trail
 
-    def set_value_validated(self, row, col, value): # Sets a value in the board if valid, updating tracking sets
+    def release(self, mark): # Ends a checkpoint; recording stops once the outermost one (mark 0) is released
+        if mark == 0:
+            self.trail = None
+
+    def remove_candidates(self, i, mask): # Removes candidate bits from empty cell i, returns True if any were removed
+        old_mask = self.cand[i]
+        new_mask = old_mask & ~mask
+        if new_mask == old_mask:
+            return False
+        if self.trail is not None:
+            self.trail.append((_UNDO_CANDIDATES, i, old_mask))
+        self.buckets[old_mask.bit_count()].discard(i)
+        self.cand[i] = new_mask
+        self.buckets[new_mask.bit_count()].add(i)
+        return True
+
+    def _open_cell(self, i): # Adds a newly emptied cell back to the empty index
+        mask = self._mask_from_units(i)
+        self.cand[i] = mask
+        self.empty.add(i)
+        self.buckets[mask.bit_count()].add(i)
+
+    def _refresh_peers(self, i): # Recomputes the candidates of the empty peers of a cell from the masks
+        cand = self.cand
+        buckets = self.buckets
+        empty = self.empty
+        for p in self.peers[i]:
+            if p in empty:
+                old_mask = cand[p]
+                mask = self._mask_from_units(p)
+                if mask != old_mask:
+                    buckets[old_mask.bit_count()].discard(p)
+                    cand[p] = mask
+                    buckets[mask.bit_count()].add(p)
+
+    def _mask_from_units(self, i): # Candidate mask of a cell computed from its row, column and box masks
+        r, c, b = self.cell_units[i]
+        return self.full_mask & ~(self.rows_mask[r] | self.cols_mask[c] | self.boxes_mask[b])
+
+    def _rebuild_candidates(self): # Recomputes the whole candidate table from the grid and masks, dropping any trail
+        n = self.size
+        self.trail = None
+        self.cand = [0] * (n * n)
+        self.empty = set()
+        self.buckets = [set() for _ in range(n + 1)]
+        for i, val in enumerate(self.cells):
+            if val == EMPTY:
+                self._open_cell(i)
+
+    def set_value_validated(self, row, col, value): # Sets a value in the board if valid, updating the unit masks, unit_counts and candidate table
         if check_num_is_valid(self, row, col, value) or value is None:
             self.set_value(row, col, value)
         else:
             raise ValueError(f"Invalid value {value} for cell ({row}, {col})")
         
-    def generate_random(self): # Generates a random solved board
-        while not self.is_solved():
-            self.set_all(None)
-            solve(self, randomized=True)
-        self.solution_grid = self.grid.copy()
+    def generate_random(self, engine="backtrack", control=None, method="pattern", stats=None, restarts="luby", restart_backtracks=None,
+                        portfolio=None): # Generates a random solved board
+        """method "pattern" shuffles a canonical solved grid with validity-preserving transforms,
+        which takes microseconds. method "search" fills a blank board with a randomized solve
+        using the given engine, as generation worked originally, restarting it under the
+        restarts policy and restart_backtracks passed on to solve (None searches without a budget).
+        DLX rebuilds its exact cover matrix on every attempt, so restarts mostly pay off with the
+        backtracking engine, where they stop the rare fills that run for minutes. portfolio,
+        a parallel.Portfolio, races the search across processes instead.
+        stats, a SolveStats, gets the time under the "generate" phase."""
+        if method not in GENERATION_METHODS:
+            raise ValueError(f"Unknown generation method {method!r}, expected one of {GENERATION_METHODS}")
+        with _phase(stats, "generate"):
+            if method == "pattern":
+                self._generate_from_pattern()
+            else:
+                while not self.is_solved():
+                    self.set_all(None)
+                    solve(self, randomized=True, engine=engine, techniques=FILL_TECHNIQUES, control=control, stats=stats,
+                          restarts=restarts, restart_backtracks=restart_backtracks, portfolio=portfolio)
+        self.solution_grid = self.grid.to_list()
+
+    def _generate_from_pattern(self): # Fills the board with a randomly transformed shifted-pattern grid
+        n = self.size
+        bw = self.box_width
+
+        # Row r of the canonical grid is the digit sequence shifted by bw * (r % bw) + r // bw,
+        # which places every digit once per row, column and box
+        def shuffled_lines():
+            bands = random.sample(range(bw), bw)
+            return [band * bw + line for band in bands for line in random.sample(range(bw), bw)]
+
+        rows = shuffled_lines()
+        cols = shuffled_lines()
+        digits = random.sample(range(n), n)
+        grid = [[digits[(bw * (r % bw) + r // bw + c) % n] for c in cols] for r in rows]
+        if random.random() < 0.5:
+            grid = [list(col) for col in zip(*grid)]
+        self.grid = grid
+        self.rebuild_masks_from_grid()
 
     def unfill_cells(self, percent_unfill): # Unfills a percentage of cells to create a puzzle
         total_cells = self.size * self.size
@@ -67,109 +460,69 @@ class Board:
         all_positions = [(r, c) for r in range(self.size) for c in range(self.size)]
         random_positions = random.sample(all_positions, cells_to_unfill)
         for r, c in random_positions:
-            # use set_value to update masks and sets properly
+            # use set_value to update the unit masks, unit_counts and candidate table properly
             self.set_value(r, c, None)
 
-    def is_solved(self): # Checks if the board is completely and correctly filled
-        n = self.size
-        allowed = set(self.valid_nums)
+    def is_complete(self): # Constant-time check that every cell is filled with no duplicate in any unit
+        return self.filled == self.size * self.size and self.conflicts == 0
 
-        # rows
-        for r in range(n):
-            if set(self.grid[r]) != allowed:
-                return False
+    def is_solved(self): # Checks if the board is completely and correctly filled
+        allowed = set(range(self.size))
+        cells = self.cells
 
-        # columns
-        for c in range(n):
-            col = [self.grid[r][c] for r in range(n)]
-            if set(col) != allowed:
+        # Rows, columns and boxes all live in units
+        for unit in self.units:
+            if {cells[i] for i in unit} != allowed:
                 return False
-
-        # boxes
-        box_width = int(math.sqrt(n))
-        for br in range(0, n, box_width):
-            for bc in range(0, n, box_width):
-                box_cells = []
-                for r in range(br, br + box_width):
-                    for c in range(bc, bc + box_width):
-                        box_cells.append(self.grid[r][c])
-                if set(box_cells) != allowed:
-                    return False
-
         return True
 
+    def candidate_matrix(self): # Candidate mask of every cell derived from the masks, 0 for filled cells
+        n = self.size
+        cand = [0 if val != EMPTY else self._mask_from_units(i) for i, val in enumerate(self.cells)]
+        return [cand[r * n:(r + 1) * n] for r in range(n)]
+
     def __repr__(self):
-        return f"Board(size={self.size})"
+        return f"{type(self).__name__}(size={self.size})"
 
     def set_all(self, value): # Sets all cells to a specific value
         n = self.size
-        # Build the grid and reset tracking sets and masks
-        self.grid = [[value for _ in range(n)] for _ in range(n)]
-        self.rows = [set() for _ in range(n)]
-        self.cols = [set() for _ in range(n)]
-        self.boxes = [set() for _ in range(n)]
-        self.rows_mask = [0 for _ in range(n)]
-        self.cols_mask = [0 for _ in range(n)]
-        self.boxes_mask = [0 for _ in range(n)]
-
-        # Populate tracking sets and masks if value is not None
-        if value is not None:
-            bit = 1 << value
-            for r in range(n):
-                for c in range(n):
-                    self.rows[r].add(value)
-                    self.cols[c].add(value)
-                    box = (r // self.box_width) * self.box_width + (c // self.box_width)
-                    self.boxes[box].add(value)
-                    self.rows_mask[r] |= bit
-                    self.cols_mask[c] |= bit
-                    self.boxes_mask[box] |= bit
+        # Fill the cells, then derive the tracking structures from them
+        self.cells = array("b", [EMPTY if value is None else value]) * (n * n)
+        self.rebuild_masks_from_grid()
 
     def board_copy(self): # Returns a copy of the board with all attributes
         # Create an instance without running __init__ to avoid allocating
         # temporary structures twice. Copy only the necessary attributes.
-        new = object.__new__(Board)
+        new = object.__new__(type(self))
         new.size = self.size
         new.box_width = self.box_width
-        new.grid = [row.copy() for row in self.grid]
-        new.rows = [s.copy() for s in self.rows]
-        new.cols = [s.copy() for s in self.cols]
-        new.boxes = [s.copy() for s in self.boxes]
-        new.valid_nums = self.valid_nums[:] if hasattr(self, 'valid_nums') else [i for i in range(new.size)]
-        new.valid_chars = self.valid_chars[:] if hasattr(self, 'valid_chars') else [format(i, 'X') for i in range(new.size)]
+        new.cells = self.cells[:]
         new.num_solutions = self.num_solutions
         new.solution_grid = self.solution_grid.copy() if self.solution_grid is not None else None
         new.full_mask = self.full_mask
         new.rows_mask = self.rows_mask[:]
         new.cols_mask = self.cols_mask[:]
         new.boxes_mask = self.boxes_mask[:]
+        new.unit_counts = self.unit_counts[:]
+        new.filled = self.filled
+        new.conflicts = self.conflicts
+        new.peers = self.peers
+        new.cell_units = self.cell_units
+        new.units = self.units
+        new.segments = self.segments
+        new.cand = self.cand[:]
+        new.empty = self.empty.copy()
+        new.buckets = [bucket.copy() for bucket in self.buckets]
+        new.trail = None
         return new
     
     def rebuild_masks_from_grid(self):
         # Reset all tracking structures
-        self.rows = [set() for _ in range(self.size)]
-        self.cols = [set() for _ in range(self.size)]
-        self.boxes = [set() for _ in range(self.size)]
-        self.rows_mask = [0] * self.size
-        self.cols_mask = [0] * self.size
-        self.boxes_mask = [0] * self.size
-
-        # Populate from current grid
-        for r in range(self.size):
-            for c in range(self.size):
-                val = self.grid[r][c]
-                if val is None:
-                    continue
-
-                box_index = (r // self.box_width) * self.box_width + (c // self.box_width)
-
-                # Update sets
-                self.rows[r].add(val)
-                self.cols[c].add(val)
-                self.boxes[box_index].add(val)
-
-                # Update masks
-                bit = 1 << val
-                self.rows_mask[r] |= bit
-                self.cols_mask[c] |= bit
-                self.boxes_mask[box_index] |= bit
\ No newline at end of file
+        self._reset_units()
+
+        # Populate from the current cells
+        for i, val in enumerate(self.cells):
+            if val != EMPTY:
+                self._add_to_units(*self.cell_units[i], val)
+
+        self._rebuild_candidates()
@@ -0,0 +1,106 @@
+from array import array
+from board import Board
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional, only NumpyBoard needs it
+    np = None
+
+EMPTY = 255 # Sentinel for empty cells in the uint8 grid, Board's -1 read as unsigned
+
+
+def _box_view(values, box_width): # Rearranges (..., n, n) grids so the last axis runs over each box's cells
+    n = box_width * box_width
+    lead = values.shape[:-2]
+    boxes = values.reshape(*lead, box_width, box_width, box_width, box_width)
+    return np.swapaxes(boxes, -3, -2).reshape(*lead, n, n)
+
+
+def _unit_masks(values, axis): # OR of 1 << digit over an axis of a uint8 grid, ignoring empty cells
+    filled = values != EMPTY
+    bits = np.where(filled, np.left_shift(np.uint64(1), np.where(filled, values, 0).astype(np.uint64)), np.uint64(0))
+    return np.bitwise_or.reduce(bits, axis=axis)
+
+
+def bulk_is_solved(values, box_width):
+    """Validates a stack of grids at once. values is a (k, n, n) uint8 array using EMPTY for
+    blanks; returns a boolean array of length k telling which grids are completely solved."""
+    n = values.shape[-1]
+    full = np.uint64((1 << n) - 1)
+    solved = ~(values == EMPTY).any(axis=(-2, -1))
+    solved &= (_unit_masks(values, -1) == full).all(axis=-1)
+    solved &= (_unit_masks(values, -2) == full).all(axis=-1)
+    solved &= (_unit_masks(_box_view(values, box_width), -1) == full).all(axis=-1)
+    return solved
+
+
+class NumpyBoard(Board):
+    """Board whose cell array is also exposed as an (n, n) uint8 NumPy view (EMPTY for blanks).
+    Cell-by-cell work from the solver and display goes through the inherited Python structures,
+    while validation, mask rebuilds and the candidate matrix are computed on the array."""
+    __slots__ = ()
+
+    def __init__(self, size):
+        if np is None:
+            raise ImportError("NumpyBoard requires numpy")
+        super().__init__(size)
+
+    @property
+    def values(self): # Shares memory with cells, so it never needs to be kept in sync
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.size, self.size)
+
+    def is_solved(self):
+        return bool(bulk_is_solved(self.values[np.newaxis], self.box_width)[0])
+
+    def rebuild_masks_from_grid(self):
+        n = self.size
+        values = self.values
+        self.rows_mask = [int(mask) for mask in _unit_masks(values, 1)]
+        self.cols_mask = [int(mask) for mask in _unit_masks(values, 0)]
+        self.boxes_mask = [int(mask) for mask in _unit_masks(_box_view(values, self.box_width), 1)]
+
+        # Unit counts come from one bincount over the (row, col, box) slot of every filled cell
+        rows, cols = np.nonzero(values != EMPTY)
+        digits = values[rows, cols].astype(np.int64)
+        boxes = (rows // self.box_width) * self.box_width + cols // self.box_width
+        slots = np.concatenate((rows * n + digits, (n + cols) * n + digits, (2 * n + boxes) * n + digits))
+        counts = np.bincount(slots, minlength=3 * n * n)
+        self.unit_counts = array("B", counts.astype(np.uint8).tobytes())
+        self.filled = len(digits)
+        self.conflicts = int(np.maximum(counts - 1, 0).sum())
+
+        # Fill the candidate table and MRV buckets from the vectorized candidate matrix
+        self.trail = None
+        cand = self.candidate_array()
+        counts = self._popcount(cand)
+        self.cand = cand.ravel().tolist()
+        empty = np.flatnonzero(values.ravel() == EMPTY)
+        self.empty = set(empty.tolist())
+        self.buckets = [set() for _ in range(n + 1)]
+        flat_counts = counts.ravel()
+        for k in np.unique(flat_counts[empty]).tolist():
+            self.buckets[k] = set(empty[flat_counts[empty] == k].tolist())
+
+    def candidate_matrix(self): # Same nested lists of ints as Board.candidate_matrix, computed with numpy
+        return self.candidate_array().tolist()
+
+    def candidate_array(self): # Candidate masks of every cell as an (n, n) uint64 array, 0 for filled cells
+        n = self.size
+        bw = self.box_width
+        rows = np.array(self.rows_mask, dtype=np.uint64)
+        cols = np.array(self.cols_mask, dtype=np.uint64)
+        boxes = np.array(self.boxes_mask, dtype=np.uint64)
+        box_of = (np.arange(n)[:, None] // bw) * bw + np.arange(n)[None, :] // bw
+        used = rows[:, None] | cols[None, :] | boxes[box_of]
+        cand = np.uint64(self.full_mask) & ~used
+        return np.where(self.values == EMPTY, cand, np.uint64(0))
+
+    @staticmethod
+    def _popcount(masks):
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(masks)
+        counts = np.zeros(masks.shape, dtype=np.uint8)
+        while masks.any():
+            counts += (masks & np.uint64(1)).astype(np.uint8)
+            masks = masks >> np.uint64(1)
+        return counts
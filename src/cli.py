@@ -0,0 +1,224 @@
+import argparse, collections, math, multiprocessing, os, sys, time
+from board import Board
+from solver import solve, count_solutions, get_unique_solution, char_to_num, num_to_char, format_stats, SolveStats, SearchControl, SearchTimeout, ENGINES
+from settings import GRID_SIZE, GRID_SIZES, SIZE_MAX_DIFFICULTY
+from rating import rate_puzzle, level_range, LEVELS
+from parallel import Portfolio
+
+# Headless batch interface. Puzzles are read and written one per line as size * size symbols
+# in row-major order, with "." for blanks, e.g. 256 characters for a 16x16 board:
+#
+#   python3 src/cli.py solve puzzles.txt > solutions.txt
+#   python3 src/cli.py check --timing < puzzles.txt
+#   python3 src/cli.py generate --count 100 --difficulty 55 --solutions
+#   python3 src/cli.py generate --count 100 --difficulty 60 --rating locked_candidates
+#   python3 src/cli.py rate puzzles.txt
+#   python3 src/cli.py solve --portfolio 8 hard.txt
+#   python3 src/cli.py check --timeout 5 puzzles.txt  # "timeout" for any puzzle taking longer
+#
+# Work is spread over a process pool, but results are always written in input order. With
+# --portfolio, puzzles are instead taken one at a time and raced across that many solvers.
+
+BLANK = "."
+
+
+def puzzle_from_line(line): # Parses a puzzle line into a Board, raising ValueError if it is malformed
+    size = math.isqrt(len(line))
+    if size * size != len(line) or size not in GRID_SIZES:
+        raise ValueError(f"expected {' or '.join(str(n * n) for n in GRID_SIZES)} symbols, got {len(line)}")
+    grid = []
+    for r in range(size):
+        row = []
+        for char in line[r * size:(r + 1) * size]:
+            if char == BLANK:
+                row.append(None)
+                continue
+            try:
+                num = char_to_num(char, size)
+            except ValueError:
+                num = size
+            if num >= size:
+                raise ValueError(f"symbol {char!r} is not used on {size}x{size} boards")
+            row.append(num)
+        grid.append(row)
+    return Board.from_grid(grid)
+
+
+def line_from_grid(grid): # Formats a nested list grid as one puzzle line
+    return "".join(BLANK if num is None else num_to_char(num) for row in grid for num in row)
+
+
+def solve_line(line, engine, portfolio=None, stats=None, control=None): # Returns the solved puzzle line, or a status word
+    board = puzzle_from_line(line)
+    if board.conflicts or not solve(board, engine=engine, control=control, stats=stats, portfolio=portfolio):
+        return "unsolvable"
+    return line_from_grid(board.grid)
+
+
+def check_line(line, engine, portfolio=None, stats=None, control=None): # Returns "unique", "multiple" or "unsolvable"
+    board = puzzle_from_line(line)
+    if board.conflicts:
+        return "unsolvable"
+    count = count_solutions(board, limit=2, engine=engine, control=control, stats=stats, portfolio=portfolio)
+    return ("unsolvable", "unique", "multiple")[count]
+
+
+def rate_line(line, stats=None, control=None): # Returns the rating score and hardest technique needed; rating never searches
+    rating = rate_puzzle(puzzle_from_line(line))
+    return f"{rating['score']}\t{rating['hardest']}"
+
+
+def generate_line(size, difficulty, engine, solutions, rating=None, attempts=1, stats=None, control=None):
+    """Returns a new puzzle line, followed by its solution if asked. With rating, a (low, high)
+    score range, puzzles are generated until one rates inside it, at most attempts times."""
+    for _ in range(attempts):
+        board = Board(size)
+        board.generate_random(control=control, stats=stats)
+        puzzle = get_unique_solution(board, difficulty, engine=engine, control=control, stats=stats)
+        if rating is None or rating[0] <= rate_puzzle(puzzle)["score"] <= rating[1]:
+            break
+    else:
+        raise ValueError(f"no puzzle rated {rating[0]}-{rating[1]} in {attempts} attempts")
+    line = line_from_grid(puzzle.grid)
+    if solutions:
+        line += "\t" + line_from_grid(board.solution_grid)
+    return line
+
+
+def run_task(task):
+    """Runs one (function, args, collect stats, timeout) task in a worker, returning (output,
+    seconds, SolveStats dict or None). A task still searching after timeout seconds stops and
+    outputs "timeout", so one hard puzzle cannot hold up a worker indefinitely."""
+    function, args, collect_stats, timeout = task
+    stats = SolveStats() if collect_stats else None
+    control = SearchControl(timeout) if timeout else None
+    started = time.perf_counter()
+    try:
+        output = function(*args, stats=stats, control=control)
+    except SearchTimeout:
+        output = "timeout"
+    except ValueError as error:
+        output = f"error: {error}"
+    return output, time.perf_counter() - started, stats.as_dict() if stats is not None else None
+
+
+def run_ordered(tasks, workers, in_flight):
+    """Yields run_task's result for each task in order. At most in_flight tasks are queued
+    at once, so input is consumed only as fast as results are written."""
+    if workers <= 0:
+        for task in tasks:
+            yield run_task(task)
+        return
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.apply_async(run_task, (task,)))
+            if len(pending) >= in_flight:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def read_lines(paths): # Streams the puzzle on each non-blank line of the given files, or of stdin
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        stream = sys.stdin if path == "-" else open(path)
+        try:
+            for line in stream:
+                # Anything after the puzzle, such as the solution or timing written by this tool, is ignored
+                fields = line.split()
+                if fields:
+                    yield fields[0]
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def build_tasks(args, portfolio=None): # Lazily builds the tasks for the chosen command
+    if args.command == "solve":
+        return ((solve_line, (line, args.engine, portfolio), args.stats, args.timeout) for line in read_lines(args.files))
+    if args.command == "check":
+        return ((check_line, (line, args.engine, portfolio), args.stats, args.timeout) for line in read_lines(args.files))
+    if args.command == "rate":
+        return ((rate_line, (line,), args.stats, args.timeout) for line in read_lines(args.files))
+    generate_args = (args.size, args.difficulty, args.engine, args.solutions, args.rating, args.attempts)
+    return ((generate_line, generate_args, args.stats, args.timeout) for _ in range(args.count))
+
+
+def parse_rating(text): # Parses a "LOW-HIGH" score range or a technique name into (low, high)
+    if text in LEVELS:
+        return level_range(text)
+    low, _, high = text.partition("-")
+    try:
+        return int(low), int(high or low)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LOW-HIGH or one of {', '.join(LEVELS)}")
+
+
+def parse_args(argv):
+    # Options shared by every command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes, 0 to run in this process")
+    common.add_argument("--in-flight", type=int, default=None, help="most puzzles queued at once (default 4 per worker)")
+    common.add_argument("--engine", choices=ENGINES, default="backtrack")
+    common.add_argument("--timing", action="store_true", help="append the time taken to each output line and print a summary to stderr")
+    common.add_argument("--stats", action="store_true", help="append solver statistics (nodes, backtracks, depth, ...) to each output line")
+    common.add_argument("--output", "-o", default="-", help="file to write results to (default stdout)")
+    common.add_argument("--timeout", type=float, default=None, help="seconds allowed per puzzle, after which its line reads \"timeout\"")
+
+    parser = argparse.ArgumentParser(prog="cli.py", description="Solve, check or generate puzzles without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("solve", "print the solution of each puzzle"), ("check", "report whether each puzzle has a unique solution"),
+                            ("rate", "print the difficulty rating and hardest technique of each puzzle")):
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument("files", nargs="*", help="puzzle files, one puzzle per line (default stdin)")
+        if name != "rate":
+            command.add_argument("--portfolio", type=int, default=0,
+                                 help="race this many differently seeded solvers on each puzzle, one puzzle at a time")
+    generate = commands.add_parser("generate", parents=[common], help="print new uniquely solvable puzzles")
+    generate.add_argument("--count", type=int, default=1)
+    generate.add_argument("--size", type=int, choices=GRID_SIZES, default=GRID_SIZE)
+    generate.add_argument("--difficulty", type=int, default=50, help="percentage of empty cells")
+    generate.add_argument("--solutions", action="store_true", help="append each puzzle's solution after a tab")
+    generate.add_argument("--rating", type=parse_rating, help="only keep puzzles rated LOW-HIGH, or needing the named technique")
+    generate.add_argument("--attempts", type=int, default=100, help="puzzles tried per output line when --rating is given")
+    args = parser.parse_args(argv)
+    if args.command == "generate" and not 1 <= args.difficulty <= SIZE_MAX_DIFFICULTY[args.size]:
+        parser.error(f"difficulty for {args.size}x{args.size} boards must be between 1 and {SIZE_MAX_DIFFICULTY[args.size]}")
+    if args.in_flight is None:
+        args.in_flight = 4 * max(args.workers, 1)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    # The portfolio's own processes replace the per-puzzle worker pool
+    portfolio = Portfolio(args.portfolio) if getattr(args, "portfolio", 0) > 0 else None
+    workers = 0 if portfolio is not None else args.workers
+    times = []
+    started = time.perf_counter()
+    try:
+        for result, seconds, stats in run_ordered(build_tasks(args, portfolio), workers, max(args.in_flight, 1)):
+            if stats is not None:
+                result += "\t" + format_stats(stats)
+            if args.timing:
+                result += f"\t{seconds * 1000:.1f}ms"
+                times.append(seconds)
+            output.write(result + "\n")
+            output.flush()
+    finally:
+        if portfolio is not None:
+            portfolio.close()
+        if output is not sys.stdout:
+            output.close()
+    if args.timing and times:
+        times.sort()
+        wall = time.perf_counter() - started
+        print(f"{len(times)} puzzles in {wall:.2f}s, per puzzle mean {sum(times) / len(times) * 1000:.1f}ms, "
+              f"median {times[len(times) // 2] * 1000:.1f}ms, max {times[-1] * 1000:.1f}ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
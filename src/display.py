@@ -1,10 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
 import tkinter.messagebox as mb
-from settings import get_settings, SettingsDict, set_default_settings, set_dark_mode
+from settings import get_settings, SettingsDict, set_default_settings, set_dark_mode, GRID_SIZES, SIZE_MAX_DIFFICULTY
 from board import Board
-from solver import check_num_is_valid, char_to_num, num_to_char, get_unique_solution, best_empty_cell
+from solver import check_num_is_valid, char_to_num, num_to_char, best_empty_cell, format_stats, CASE_INSENSITIVE_SIZE
 from save import save_state, load_state, SAVE_PATH
+from pool import PuzzlePool, GenerationJob, SolveJob
 
 class HexDokuDisplay:
     board: "Board | None"
@@ -35,6 +36,12 @@ class HexDokuDisplay:
         self.cells = None # To be initialized after board is set
 
         self.hardcore_mode = tk.BooleanVar(value=False) # Variable for hardcore mode, which will disable hints, fills, and incorrect input indication
+
+        # Ready-made puzzles generated in the background so starting a game is instant
+        self.pool = self._make_pool()
+        self.generation = None # GenerationJob running when no pooled puzzle was ready
+        self.generation_stats = None # SolveStats dict from generating the current puzzle, for the debug panel
+        self.measure = None # SolveJob started by the debug panel's Measure Solve button
         
         self._build_start_screen()
         self.start_frame.pack(fill='both', expand=True)
@@ -42,6 +49,18 @@ class HexDokuDisplay:
         # Center window on screen after rendering
         self.root.after(100, self._center_window)
     
+    def _make_pool(self): # Starts a puzzle pool for the configured grid size
+        # Bands above the size's difficulty cap could never be asked for, and generating them can take minutes
+        max_difficulty = self._max_difficulty()
+        bands = [[low, min(high, max_difficulty)] for low, high in self.settings["difficulty_bands"] if low <= max_difficulty]
+        pool = PuzzlePool(self.settings["grid_size"], bands, self.settings["pool_size"], self.settings["pool_workers"],
+                          self.settings["generation_timeout"] or None, max_difficulty)
+        pool.start()
+        return pool
+
+    def _max_difficulty(self): # Difficulty cap for the configured grid size
+        return min(self.settings["max_difficulty"], SIZE_MAX_DIFFICULTY.get(self.settings["grid_size"], self.settings["max_difficulty"]))
+
     def _center_window(self):
         """Center the window on the screen"""
         self.root.update_idletasks()
@@ -62,14 +81,15 @@ class HexDokuDisplay:
         label = tk.Label(self.start_frame, text="HexDoku", font=(self.settings["font"], self.settings["title_font_size"]), bg=self.settings["background_color"], fg=self.settings["text_color_1"])
         label.pack(pady=20)
 
-        tk.Label(self.start_frame, text=f"Select Difficulty ({self.settings['min_difficulty']}-{self.settings['max_difficulty']}):", font=(self.settings["font"], self.settings["button_font_size"]), bg=self.settings["background_color"], fg=self.settings["text_color_1"]).pack(pady=10)
+        max_difficulty = self._max_difficulty()
+        tk.Label(self.start_frame, text=f"Select Difficulty ({self.settings['min_difficulty']}-{max_difficulty}):", font=(self.settings["font"], self.settings["button_font_size"]), bg=self.settings["background_color"], fg=self.settings["text_color_1"]).pack(pady=10)
 
         # Difficulty slider, controls percent of cells to unfill
-        self.difficulty_var = tk.IntVar(value=int(self.settings["max_difficulty"] - self.settings["min_difficulty"]) // 2 + self.settings["min_difficulty"])
+        self.difficulty_var = tk.IntVar(value=int(max_difficulty - self.settings["min_difficulty"]) // 2 + self.settings["min_difficulty"])
         slider = tk.Scale(
             self.start_frame, 
             from_=self.settings["min_difficulty"], 
-            to=self.settings["max_difficulty"], 
+            to=max_difficulty, 
             orient="horizontal",
             variable=self.difficulty_var,
             showvalue=True,
@@ -108,6 +128,7 @@ class HexDokuDisplay:
 
     def _start_game(self):
         # Kill the old frames
+        self._cancel_measure()
         if hasattr(self, 'game_frame'):
             self.game_frame.destroy()
 
@@ -115,20 +136,80 @@ class HexDokuDisplay:
         percent_unfill = self.difficulty_var.get()
         hardcore = self.hardcore_mode.get()
 
-        # Generate puzzle board based on difficulty
-        puzzle = Board(16)
-        puzzle.generate_random()
-        puzzle = get_unique_solution(puzzle, percent_unfill)
+        # The pool follows the grid size setting, which may have changed since it started
+        if self.pool.size != self.settings["grid_size"]:
+            self.pool.shutdown()
+            self.pool = self._make_pool()
+
+        # Take a puzzle from the pool, generating one in the background only if none is ready
+        ready = self.pool.take(percent_unfill)
+        if ready is None:
+            self._start_generation(percent_unfill, hardcore)
+            return
+        puzzle, difficulty, stats = ready
+        self.difficulty_var.set(difficulty)
+        self._begin_game(puzzle, hardcore, stats)
+
+    def _begin_game(self, puzzle, hardcore, stats=None):
         self.board = puzzle
-        self.fixed = [[self.board.grid[r][c] for c in range(self.board.size)] for r in range(self.board.size)]
+        self.generation_stats = stats
+        self.fixed = self.board.grid.to_list()
         self.cells = [[None for _ in range(self.board.size)] for _ in range(self.board.size)]
         self.hardcore = hardcore
 
         # Setup game frames
         self._setup_game_frames()
 
+    def _start_generation(self, percent_unfill, hardcore):
+        # Generate on a worker thread and keep the window responsive, polling the job with root.after
+        self.generation = GenerationJob(self.settings["grid_size"], percent_unfill, self.settings["generation_timeout"])
+        self.generation_hardcore = hardcore
+        self.start_frame.pack_forget()
+        self.generating_frame = tk.Frame(self.content_frame, bg=self.settings["background_color"])
+        tk.Label(self.generating_frame, text=f"Generating puzzle ({percent_unfill}% empty)...", font=(self.settings["font"], self.settings["button_font_size"]), bg=self.settings["background_color"], fg=self.settings["text_color_1"]).pack(pady=20, padx=20)
+        self.generation_status = tk.Label(self.generating_frame, text="", bg=self.settings["background_color"], fg=self.settings["text_color_1"])
+        self.generation_status.pack(pady=10)
+        cancel_button = tk.Button(self.generating_frame, text="Cancel", command=self._cancel_generation, bg=self.settings["quit_button_color"], fg=self.settings["text_color_2"])
+        cancel_button.pack(pady=10)
+        self.generating_frame.pack(fill='both', expand=True)
+        self.generation.start()
+        self.root.after(100, self._poll_generation)
+
+    def _poll_generation(self):
+        job = self.generation
+        if job is None:
+            return # Cancelled, the start screen is already back
+        if not job.done():
+            status = f"{job.elapsed():.1f}s elapsed, {job.nodes:,} nodes searched"
+            if self.settings["debug_panel"]:
+                status += f"\n{job.stats.backtracks:,} backtracks, {job.stats.uniqueness_checks:,} uniqueness checks, {job.stats.retries:,} retries"
+            self.generation_status.config(text=status)
+            self.root.after(100, self._poll_generation)
+            return
+
+        self.generation = None
+        self.generating_frame.destroy()
+        if job.result is None:
+            self.start_frame.pack(fill='both', expand=True)
+            if job.timed_out:
+                mb.showinfo("Generation Timed Out", f"No puzzle was found within {self.settings['generation_timeout']} seconds. Try a lower difficulty.")
+                return
+            mb.showerror("Generation Failed", f"Could not generate a puzzle: {job.error}")
+            return
+        self._begin_game(job.result, self.generation_hardcore, job.stats.as_dict())
+
+    def _cancel_generation(self):
+        # The worker stops at its next search node; return to the start screen with the slider untouched
+        if self.generation is not None:
+            self.generation.cancel()
+            self.generation = None
+        self.generating_frame.destroy()
+        self.start_frame.pack(fill='both', expand=True)
+        mb.showinfo("Generation Cancelled", "Puzzle generation was cancelled. Try a lower difficulty for a faster start.")
+
     def _setup_game_frames(self):
         # Kill the old frames
+        self._cancel_measure()
         if hasattr(self, 'game_frame'):
             self.game_frame.destroy()
 
@@ -160,18 +241,72 @@ class HexDokuDisplay:
         self._build_grid()
         self._render_board()
 
+        if self.settings["debug_panel"]:
+            self._build_debug_panel()
+
+    def _build_debug_panel(self):
+        # Solver statistics for the current puzzle, from its generation and on demand from a fresh solve
+        debug_frame = tk.Frame(self.game_frame, bg=self.settings["background_color"])
+        debug_frame.pack(side="top", fill="x", pady=5)
+        generated = format_stats(self.generation_stats) if self.generation_stats else "not recorded"
+        tk.Label(debug_frame, text=f"Generation: {generated}", wraplength=600, justify="left", bg=self.settings["background_color"], fg=self.settings["text_color_1"]).pack(side="top", anchor="w", padx=10)
+        self.solve_stats_label = tk.Label(debug_frame, text="Solve: not measured", wraplength=600, justify="left", bg=self.settings["background_color"], fg=self.settings["text_color_1"])
+        self.solve_stats_label.pack(side="top", anchor="w", padx=10)
+        tk.Button(debug_frame, text="Measure Solve", command=self._measure_solve).pack(side="top", anchor="w", padx=10, pady=5)
+
+    def _measure_solve(self):
+        # Solves a copy of the starting puzzle on a worker thread, leaving the player's board and the window alone
+        if self.fixed is None or self.measure is not None:
+            return
+        self.measure = SolveJob(Board.from_grid(self.fixed), self.settings["generation_timeout"])
+        self.measure.start()
+        self.root.after(100, self._poll_measure)
+
+    def _poll_measure(self):
+        job = self.measure
+        if job is None:
+            return # Cancelled along with the game it was measuring
+        if not job.done():
+            self.solve_stats_label.config(text=f"Solve: {job.elapsed():.1f}s elapsed, {job.nodes:,} nodes searched")
+            self.root.after(100, self._poll_measure)
+            return
+        self.measure = None
+        if job.timed_out:
+            text = f"timed out after {self.settings['generation_timeout']}s, {job.stats.summary()}"
+        elif job.error is not None:
+            text = f"failed: {job.error}"
+        elif job.result is None:
+            text = f"no solution, {job.stats.summary()}"
+        else:
+            text = job.stats.summary()
+        self.solve_stats_label.config(text=f"Solve: {text}")
+
+    def _cancel_measure(self): # Stops a running Measure Solve before its label goes away
+        if self.measure is not None:
+            self.measure.cancel()
+            self.measure = None
+
     def _on_quit(self):
+        if self.generation is not None:
+            self.generation.cancel()
+        self._cancel_measure()
         if self.board is not None:
             save_state(self.board, self.fixed, self.difficulty_var.get(), self.hardcore)
+        self.pool.shutdown()
         self.root.quit()
 
     def _build_grid(self):
         if self.board is None or self.cells is None:
             raise ValueError("Board and cells must be initialized before building the grid.")
         
+        # Shrink the cell font on boards larger than 16x16 so they still fit on screen
+        font_size = self.settings["cell_font_size"]
+        if self.board.size > 16:
+            font_size = max(6, font_size * 16 // self.board.size)
+
         for r in range(self.board.size):
             for c in range(self.board.size):
-                # Decide if this cell is on a 4x4 box boundary
+                # Decide if this cell is on a box boundary
                 top_border    = (r % self.board.box_width == 0)
                 left_border   = (c % self.board.box_width == 0)
                 bottom_border = (r == self.board.size - 1)
@@ -193,7 +328,7 @@ class HexDokuDisplay:
                     pady=(ipady_top, ipady_bot)
                 )
 
-                entry = tk.Entry(inner, width=2, font=(self.settings["font"], self.settings["cell_font_size"]), 
+                entry = tk.Entry(inner, width=2, font=(self.settings["font"], font_size), 
                                justify="center", state='normal')
                 entry.pack()
                 
@@ -248,6 +383,7 @@ class HexDokuDisplay:
         self._back_to_start()
 
     def _back_to_start(self):
+        self._cancel_measure()
         if self.board is not None:
             save_state(self.board, self.fixed, self.difficulty_var.get(), self.hardcore)
         if hasattr(self, 'game_frame') and self.game_frame.winfo_exists():
@@ -262,7 +398,7 @@ class HexDokuDisplay:
             raise ValueError("Board and cells must be initialized before handling cell changes.")
         
         widget = event.widget
-        text = widget.get().strip().upper()
+        text = widget.get().strip()
 
         # If fixed cell, revert any changes
         if self._is_fixed_cell(r, c) and self.fixed is not None:
@@ -280,20 +416,22 @@ class HexDokuDisplay:
             return
         
         # Validate that input is a single allowed character
+        if self.board.size <= CASE_INSENSITIVE_SIZE:
+            text = text.upper()
         allowed = set(self.board.valid_chars)
         if len(text) != 1 or text not in allowed:
             widget.config(state='normal', bg=self.settings["error_color"], fg=self.settings["text_color_2"])
             return
         
         # Convert char to number
-        num = char_to_num(text)
+        num = char_to_num(text, self.board.size)
         
         if check_num_is_valid(self.board, r, c, num):
             self.board.set_value(r, c, num)
             widget.config(state='normal', bg=self.settings["empty_cell_color"], fg=self.settings["text_color_1"])
 
             # Check for puzzle completion
-            if self.board.is_solved():
+            if self.board.is_complete():
                 self._show_puzzle_complete()
         else:
             # Clear the cell from the board state when validation fails
@@ -334,7 +472,7 @@ class HexDokuDisplay:
         cell.config(bg=self.settings["fill_cell_color"], fg=self.settings["text_color_1"])
 
         # Check for puzzle completion
-        if self.board.is_solved():
+        if self.board.is_complete():
             self._show_puzzle_complete()
 
     def _restart_game(self):
@@ -365,6 +503,7 @@ class HexDokuDisplay:
         self.fixed = fixed
         board.solution_grid = solution
         self.hardcore = hardcore
+        self.generation_stats = None
 
         # Rebuild masks/sets from grid (so check_num_is_valid works)
         board.rebuild_masks_from_grid()
@@ -403,6 +542,37 @@ class HexDokuDisplay:
         font_selection.pack(side="left", padx=5, fill='x', expand=True)
         font_selection.bind("<<ComboboxSelected>>", lambda e: self._on_setting_change("font", font_selection.get()))
 
+        # Grid Size Selection (full width)
+        size_frame = tk.Frame(self.settings_frame, bg=self.settings["background_color"])
+        size_frame.pack(pady=5, fill='x', padx=20)
+        tk.Label(size_frame, text="Grid Size:", bg=self.settings["background_color"], fg=self.settings["text_color_1"], width=15, anchor='e').pack(side="left", padx=5)
+        size_selection = ttk.Combobox(
+            size_frame,
+            values=[f"{size}x{size}" for size in GRID_SIZES],
+            state="readonly",
+            width=20
+        )
+        size_selection.set(f"{self.settings['grid_size']}x{self.settings['grid_size']}")
+        size_selection.pack(side="left", padx=5, fill='x', expand=True)
+        size_selection.bind("<<ComboboxSelected>>", lambda e: self._on_setting_change("grid_size", GRID_SIZES[size_selection.current()]))
+
+        # Debug Panel Toggle (full width)
+        debug_frame = tk.Frame(self.settings_frame, bg=self.settings["background_color"])
+        debug_frame.pack(pady=5, fill='x', padx=20)
+        debug_var = tk.BooleanVar(value=self.settings["debug_panel"])
+        debug_check = tk.Checkbutton(
+            debug_frame,
+            text="Show Solver Statistics",
+            variable=debug_var,
+            command=lambda: self._on_setting_change("debug_panel", debug_var.get()),
+            bg=self.settings["background_color"],
+            fg=self.settings["text_color_1"],
+            activebackground=self.settings["background_color"],
+            activeforeground=self.settings["text_color_1"],
+            selectcolor=self.settings["background_color"]
+        )
+        debug_check.pack(side="left", padx=5)
+
         # Two-column container
         columns_frame = tk.Frame(self.settings_frame, bg=self.settings["background_color"])
         columns_frame.pack(fill='both', expand=True, padx=10, pady=10)
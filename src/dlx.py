@@ -0,0 +1,189 @@
+import random
+
+# Dancing Links (Algorithm X) exact-cover engine.
+#
+# A sudoku of size n is modelled as an exact-cover matrix with four groups of
+# n*n columns: one per cell, one per (row, digit), one per (col, digit) and
+# one per (box, digit). Every candidate placement (row, col, digit) is a
+# matrix row covering exactly one column in each group. Only the part of the
+# matrix that is still open is built: columns already satisfied by the givens
+# are left out, and only candidates consistent with the givens become rows.
+
+
+class ExactCover:
+    def __init__(self, board, randomized=False):
+        n = board.size
+        cells = n * n
+        bw = board.box_width
+        self.size = n
+
+        # Collect open constraints and candidate placements from the board
+        placements = []
+        open_cols = set(range(4 * cells))
+        for r in range(n):
+            for c in range(n):
+                val = board.cells[r * n + c]
+                box = (r // bw) * bw + (c // bw)
+                if val >= 0:
+                    open_cols.discard(r * n + c)
+                    open_cols.discard(cells + r * n + val)
+                    open_cols.discard(2 * cells + c * n + val)
+                    open_cols.discard(3 * cells + box * n + val)
+                    continue
+                mask = board.full_mask & ~(board.rows_mask[r] | board.cols_mask[c] | board.boxes_mask[box])
+                while mask:
+                    lowbit = mask & -mask
+                    d = lowbit.bit_length() - 1
+                    placements.append((r, c, d, box))
+                    mask &= mask - 1
+        if randomized:
+            random.shuffle(placements)
+
+        # Node 0 is the root, nodes 1..m are column headers, the rest are row nodes
+        header_of = {}
+        headers = sorted(open_cols)
+        m = len(headers)
+        L = list(range(-1, m)) # L[i] = i - 1
+        R = list(range(1, m + 2)) # R[i] = i + 1
+        L[0] = m
+        R[m] = 0
+        U = list(range(m + 1))
+        D = list(range(m + 1))
+        C = list(range(m + 1))
+        S = [0] * (m + 1)
+        ROW = [None] * (m + 1)
+        for h, col in enumerate(headers, 1):
+            header_of[col] = h
+
+        for r, c, d, box in placements:
+            cols = (
+                header_of[r * n + c],
+                header_of[cells + r * n + d],
+                header_of[2 * cells + c * n + d],
+                header_of[3 * cells + box * n + d],
+            )
+            first = len(C)
+            for k, h in enumerate(cols):
+                node = first + k
+                # Link vertically at the bottom of column h
+                U.append(U[h])
+                D.append(h)
+                D[U[h]] = node
+                U[h] = node
+                C.append(h)
+                S[h] += 1
+                ROW.append((r, c, d))
+                # Link horizontally into a circular list of four nodes
+                L.append(first + (k - 1) % 4)
+                R.append(first + (k + 1) % 4)
+
+        self.L, self.R, self.U, self.D, self.C, self.S, self.ROW = L, R, U, D, C, S, ROW
+
+    def solutions(self, limit=None, control=None, stats=None):
+        """Yield solutions as lists of (row, col, digit), stopping after limit.
+        A SearchControl from the solver module is ticked once per row tried, and a SolveStats
+        counts each row tried as a node and each row taken back as a backtrack."""
+        L, R, U, D, C, S, ROW = self.L, self.R, self.U, self.D, self.C, self.S, self.ROW
+
+        def cover(c):
+            L[R[c]] = L[c]
+            R[L[c]] = R[c]
+            i = D[c]
+            while i != c:
+                j = R[i]
+                while j != i:
+                    U[D[j]] = U[j]
+                    D[U[j]] = D[j]
+                    S[C[j]] -= 1
+                    j = R[j]
+                i = D[i]
+
+        def uncover(c):
+            i = U[c]
+            while i != c:
+                j = L[i]
+                while j != i:
+                    S[C[j]] += 1
+                    U[D[j]] = j
+                    D[U[j]] = j
+                    j = L[j]
+                i = U[i]
+            L[R[c]] = c
+            R[L[c]] = c
+
+        # Iterative Algorithm X, so search depth is not bound by the recursion limit
+        found = 0
+        chosen = []
+        while True:
+            if R[0] == 0:
+                found += 1
+                yield [ROW[x] for x in chosen]
+                if limit is not None and found >= limit:
+                    return
+                x = None # Backtrack from a complete solution
+            else:
+                # Choose the column with the fewest remaining rows
+                best = R[0]
+                best_size = S[best]
+                c = R[best]
+                while c != 0 and best_size > 1:
+                    if S[c] < best_size:
+                        best = c
+                        best_size = S[c]
+                    c = R[c]
+                cover(best)
+                x = D[best]
+
+            # Advance to the next row to try, backtracking through exhausted columns
+            while True:
+                if x is None:
+                    if not chosen:
+                        return
+                    x = chosen.pop()
+                    if control is not None:
+                        control.backtrack()
+                    if stats is not None:
+                        stats.backtracks += 1
+                    j = L[x]
+                    while j != x:
+                        uncover(C[j])
+                        j = L[j]
+                    x = D[x]
+                if x == C[x]:
+                    uncover(x)
+                    x = None
+                    continue
+                break
+
+            if control is not None:
+                control.tick()
+            if stats is not None:
+                stats.node(len(chosen))
+            chosen.append(x)
+            j = R[x]
+            while j != x:
+                cover(C[j])
+                j = R[j]
+
+
+def dlx_solve(board, randomized=False, control=None, stats=None): # Fills the board with its first exact-cover solution
+    for solution in ExactCover(board, randomized).solutions(limit=1, control=control, stats=stats):
+        for r, c, d in solution:
+            board.set_value(r, c, d)
+        return True
+    return False
+
+
+def dlx_count_solutions(board, limit=2, return_solutions=False, control=None, stats=None): # Counts solutions up to limit without modifying the board
+    count = 0
+    solutions = []
+    for solution in ExactCover(board).solutions(limit=limit, control=control, stats=stats):
+        count += 1
+        if return_solutions and len(solutions) < 2:
+            grid = board.grid.to_list()
+            for r, c, d in solution:
+                grid[r][c] = d
+            solutions.append(grid)
+    if return_solutions:
+        return count, solutions
+    return count
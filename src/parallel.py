@@ -0,0 +1,295 @@
+import multiprocessing, os, queue, random
+from array import array
+from board import Board
+from solver import (_search, solve, propagate, best_empty_cell, SearchControl, SearchCancelled, BudgetControl, BudgetExceeded,
+                    DEFAULT_TECHNIQUES)
+from dlx import dlx_count_solutions
+
+# Multi-process search, in two flavours sharing one kind of worker pool:
+#
+# ParallelSearch counts solutions by splitting the search tree. The top of the tree is expanded
+# in this process into independent subproblems (boards with one branch of each early guess
+# filled in), which are farmed out to the pool. Every worker adds the solutions it finds to a
+# shared counter and stops as soon as the counter reaches the limit, so a uniqueness check ends
+# everywhere the moment any worker finds a second solution. Most uniqueness checks on generated
+# puzzles take a few search nodes, far less than the cost of sending work to other processes,
+# so each count first runs serially under a small node budget and only splits the tree when
+# that budget runs out.
+#
+# Portfolio races whole searches instead. Every worker runs the same puzzle with its own random
+# seed and engine, the first answer wins and the rest are stopped. That spends CPU to cut the
+# rare searches that take orders of magnitude longer than usual under one particular guess order.
+
+SERIAL_NODES = 200 # Nodes searched in this process before splitting the tree
+SPLIT_FACTOR = 8 # Subproblems to aim for per worker, so workers that finish early find more work
+# (engine, restart policy) of each portfolio member, repeated to fill the workers
+PORTFOLIO_MEMBERS = (("backtrack", "luby"), ("backtrack", None), ("dlx", None))
+
+# Shared with the workers through the pool initializer
+_found = None # Solutions found in the current call
+_call = None # Id of the current call; workers on an older call stop
+_lock = None # Guards increments of _found
+
+
+class _SharedControl(SearchControl):
+    """Worker-side control that stops once a newer call has started or, given a limit, once
+    the shared counter reaches it."""
+
+    def __init__(self, call, limit=None):
+        super().__init__()
+        self.call = call
+        self.limit = limit
+
+    def tick(self):
+        self.nodes += 1
+        if _call.value != self.call or (self.limit is not None and _found.value >= self.limit):
+            raise SearchCancelled()
+
+
+def _init_worker(found, call, lock):
+    global _found, _call, _lock
+    _found, _call, _lock = found, call, lock
+
+
+def _load(size, cells, exclusions): # Rebuilds a subproblem board from its cells and forbidden candidates
+    board = Board(size)
+    board.cells = array("b", cells)
+    board.rebuild_masks_from_grid()
+    for i, mask in exclusions:
+        board.remove_candidates(i, mask)
+    return board
+
+
+def _count_subproblem(call, limit, size, cells, exclusions, techniques): # Runs in a worker, returns the nodes searched
+    control = _SharedControl(call, limit)
+
+    def on_solution(board):
+        with _lock:
+            if _call.value == call:
+                _found.value += 1
+            return _found.value >= limit
+
+    try:
+        _search(_load(size, cells, exclusions), False, techniques, on_solution, control)
+    except SearchCancelled:
+        pass
+    return control.nodes
+
+
+def _race_solve(call, size, cells, engine, restarts, seed, techniques):
+    """Runs one portfolio member's solve in a worker. Returns (the solved cells, b"" if there is
+    no solution or None if another member answered first, nodes searched)."""
+    random.seed(seed)
+    board = _load(size, cells, ())
+    control = _SharedControl(call)
+    try:
+        solved = solve(board, randomized=True, engine=engine, techniques=techniques, control=control, restarts=restarts)
+    except SearchCancelled:
+        return None, control.nodes
+    return (bytes(board.cells) if solved else b""), control.nodes
+
+
+def _race_count(call, size, cells, limit, engine, seed, techniques):
+    """Runs one portfolio member's count in a worker. Returns (the count or None if another
+    member answered first, nodes searched)."""
+    random.seed(seed)
+    board = _load(size, cells, ())
+    control = _SharedControl(call)
+    count = 0
+
+    def on_solution(solved):
+        nonlocal count
+        count += 1
+        return count >= limit
+
+    try:
+        if engine == "dlx":
+            count = dlx_count_solutions(board, limit=limit, control=control)
+        else:
+            _search(board, True, techniques, on_solution, control)
+    except SearchCancelled:
+        return None, control.nodes
+    return count, control.nodes
+
+
+class _WorkerPool:
+    """Spawned worker processes plus the shared counter and call id they check while searching.
+    Create one once and reuse it, as starting the workers is far more expensive than a typical
+    search; close() or a with block stops them."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context("spawn")
+        self.found = context.RawValue("q", 0)
+        self.call = context.RawValue("q", 0)
+        self.lock = context.Lock()
+        self.pool = context.Pool(self.workers, initializer=_init_worker, initargs=(self.found, self.call, self.lock))
+
+    def _begin_call(self, found=0): # Starts a new call, which stops any worker still busy with an earlier one
+        with self.lock:
+            self.call.value += 1
+            self.found.value = found
+            return self.call.value
+
+    def _end_call(self): # Stops every task of the current call still queued or running, returns the shared count
+        with self.lock:
+            self.call.value += 1
+            return self.found.value
+
+    def _wait(self, get, timeout_error, control): # Calls get with a short timeout until it returns, unless control stops the search
+        while True:
+            if control is not None:
+                control.check()
+            try:
+                return get(timeout=0.05)
+            except timeout_error:
+                continue
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParallelSearch(_WorkerPool):
+    """Counts solutions by splitting the search tree across a pool of worker processes."""
+
+    def __init__(self, workers=None, techniques=DEFAULT_TECHNIQUES, serial_nodes=SERIAL_NODES, split_factor=SPLIT_FACTOR):
+        super().__init__(workers)
+        self.techniques = tuple(techniques)
+        self.serial_nodes = serial_nodes
+        self.split_factor = split_factor
+
+    def count_solutions(self, board, limit=2, exclusions=(), control=None, stats=None):
+        """Counts the solutions of board, stopping at limit, without modifying it. exclusions
+        lists (cell, candidate mask) pairs to forbid first. control can cancel the count from
+        this process, and stats gets the nodes searched by every process."""
+        # Cheap counts never leave this process
+        serial = BudgetControl(control, self.serial_nodes)
+        count = 0
+
+        def on_solution(solved):
+            nonlocal count
+            count += 1
+            return count >= limit
+
+        root = board.board_copy()
+        for i, mask in exclusions:
+            root.remove_candidates(i, mask)
+        try:
+            _search(root, False, self.techniques, on_solution, serial, stats)
+            return count
+        except BudgetExceeded:
+            pass
+
+        count, subproblems = self._split(board, exclusions, limit)
+        if count >= limit or not subproblems:
+            return min(count, limit)
+
+        call = self._begin_call(count)
+        results = [self.pool.apply_async(_count_subproblem, (call, limit, board.size, cells, subproblem_exclusions, self.techniques))
+                   for cells, subproblem_exclusions in subproblems]
+        try:
+            for result in results:
+                nodes = self._wait(result.get, multiprocessing.TimeoutError, control)
+                if stats is not None:
+                    stats.nodes += nodes
+                if self.found.value >= limit:
+                    break
+        finally:
+            count = self._end_call()
+        return min(count, limit)
+
+    def is_unique(self, board, control=None, stats=None):
+        return self.count_solutions(board, limit=2, control=control, stats=stats) == 1
+
+    def _split(self, board, exclusions, limit):
+        """Expands the search breadth first until there are enough subproblems for the pool.
+        Returns (solutions found while expanding, [(cells, exclusions)])."""
+        target = self.workers * self.split_factor
+        root = _load(board.size, board.cells, exclusions)
+        frontier = [(root, list(exclusions))]
+        found = 0
+        while frontier and len(frontier) < target:
+            expanded = []
+            for node, node_exclusions in frontier:
+                if not propagate(node, self.techniques):
+                    continue
+                if not node.empty:
+                    found += 1
+                    if found >= limit:
+                        return found, []
+                    continue
+                row, col = best_empty_cell(node)
+                mask = node.cand[row * node.size + col]
+                while mask:
+                    lowbit = mask & -mask
+                    child = node.board_copy()
+                    child.set_value(row, col, lowbit.bit_length() - 1)
+                    expanded.append((child, node_exclusions))
+                    mask ^= lowbit
+            frontier = expanded
+        # Exclusions on cells that are now filled no longer matter
+        return found, [(bytes(node.cells), [(i, m) for i, m in node_exclusions if node.cells[i] < 0]) for node, node_exclusions in frontier]
+
+
+class Portfolio(_WorkerPool):
+    """Races one solver per worker process on the same puzzle and keeps the first answer.
+    members lists (engine, restart policy) pairs, cycled to give every worker one. Each run gets
+    its own seed, drawn from random, so seeding random makes a portfolio repeatable.
+    Pass it as portfolio to solve, count_solutions, solution_is_unique or Board.generate_random."""
+
+    def __init__(self, workers=None, members=PORTFOLIO_MEMBERS):
+        super().__init__(workers)
+        self.members = [members[k % len(members)] for k in range(self.workers)]
+
+    def solve(self, board, techniques=DEFAULT_TECHNIQUES, control=None, stats=None):
+        """Fills board with the first solution found and returns True, or returns False and
+        leaves it unchanged if it has none."""
+        tasks = [(board.size, bytes(board.cells), engine, restarts, random.getrandbits(32), tuple(techniques))
+                 for engine, restarts in self.members]
+        cells = self._race(_race_solve, tasks, control, stats)
+        if not cells:
+            return False
+        n = board.size
+        for i, num in enumerate(cells):
+            if board.cells[i] < 0:
+                board.set_value(i // n, i % n, num)
+        return True
+
+    def count_solutions(self, board, limit=2, techniques=DEFAULT_TECHNIQUES, control=None, stats=None):
+        """Counts the solutions of board up to limit, answered by whichever member finishes first."""
+        tasks = [(board.size, bytes(board.cells), limit, engine, random.getrandbits(32), tuple(techniques))
+                 for engine, restarts in self.members]
+        return self._race(_race_count, tasks, control, stats)
+
+    def _race(self, function, tasks, control, stats): # Returns the first answer any worker gives for its task
+        call = self._begin_call()
+        answers = queue.SimpleQueue()
+        for task in tasks:
+            self.pool.apply_async(function, (call, *task), callback=answers.put, error_callback=answers.put)
+        try:
+            for _ in tasks:
+                answer = self._wait(answers.get, queue.Empty, control)
+                if isinstance(answer, BaseException):
+                    raise answer
+                answer, nodes = answer
+                if stats is not None:
+                    stats.nodes += nodes
+                if answer is not None:
+                    return answer
+            raise SearchCancelled() # Only reached if every member was stopped from outside
+        finally:
+            self._end_call()
+
+
+def parallel_count_solutions(board, limit=2, workers=None, techniques=DEFAULT_TECHNIQUES): # One-off count with a temporary pool
+    with ParallelSearch(workers, techniques) as search:
+        return search.count_solutions(board, limit)
@@ -0,0 +1,186 @@
+import multiprocessing, random, threading, time
+from board import Board
+from solver import solve, get_unique_solution, SearchControl, SearchCancelled, SearchTimeout, SolveStats
+from save import save_pool, load_pool
+from rating import rate_puzzle
+
+
+POOL_RETRIES = 3 # Failed generations in a row after which a band waits for the next take() to try again
+
+
+def generate_puzzle(size, difficulty, timeout=None, control=None): # Generates one puzzle, run inside the worker processes
+    # A worker stuck on an unlucky puzzle gives up with SearchTimeout after timeout seconds
+    if control is None and timeout:
+        control = SearchControl(timeout)
+    stats = SolveStats()
+    board = Board(size)
+    board.generate_random(control=control, stats=stats)
+    puzzle = get_unique_solution(board, difficulty, control=control, stats=stats)
+    rating = rate_puzzle(puzzle)
+    return {"difficulty": difficulty, "grid": puzzle.grid.to_list(), "solution": board.solution_grid, "stats": stats.as_dict(),
+            "rating": rating["score"], "technique": rating["hardest"]}
+
+
+class SearchJob:
+    """Runs a search on a worker thread so a UI can poll its progress and cancel it, keeping the
+    window responsive. With a timeout in seconds, the job gives up on its own once it runs that
+    long. Subclasses implement work(), which returns the result."""
+
+    def __init__(self, timeout=None):
+        self.control = SearchControl(timeout or None)
+        self.stats = SolveStats() # Filled in as the search runs, readable while it does
+        self.result = None # Return value of work() once it succeeds
+        self.error = None # Exception raised by the search, if any
+        self.timed_out = False # Whether the search stopped at the timeout
+        self.started = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.monotonic()
+        self.thread.start()
+
+    def work(self):
+        raise NotImplementedError
+
+    def _run(self):
+        try:
+            self.result = self.work()
+        except SearchTimeout:
+            self.timed_out = True
+        except SearchCancelled:
+            pass
+        except Exception as error:
+            self.error = error
+
+    def done(self):
+        return self.started is not None and not self.thread.is_alive()
+
+    def cancel(self):
+        self.control.cancel()
+
+    def elapsed(self): # Seconds since the job started
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    @property
+    def nodes(self): # Search nodes visited so far
+        return self.control.nodes
+
+
+class GenerationJob(SearchJob):
+    """Generates one puzzle; result is the puzzle Board once generation succeeds."""
+
+    def __init__(self, size, difficulty, timeout=None):
+        super().__init__(timeout)
+        self.size = size
+        self.difficulty = difficulty
+
+    def work(self):
+        board = Board(self.size)
+        board.generate_random(control=self.control, stats=self.stats)
+        return get_unique_solution(board, self.difficulty, control=self.control, stats=self.stats)
+
+
+class SolveJob(SearchJob):
+    """Solves a board in place; result is the board if it was solved, None if it has no solution."""
+
+    def __init__(self, board, timeout=None):
+        super().__init__(timeout)
+        self.board = board
+
+    def work(self):
+        return self.board if solve(self.board, control=self.control, stats=self.stats) else None
+
+
+class PuzzlePool:
+    """Keeps a few ready-made puzzles per difficulty band, refilled in the background by a
+    process pool, so starting a game does not wait on generation. Leftover puzzles are saved
+    on shutdown and picked up again on the next start."""
+
+    def __init__(self, size, bands, per_band, workers, timeout=None, max_difficulty=None):
+        self.size = size
+        self.bands = [tuple(band) for band in bands]
+        self.per_band = per_band
+        self.workers = workers
+        self.timeout = timeout # Seconds a worker may spend on one puzzle before abandoning it
+        self.max_difficulty = max_difficulty # Highest difficulty ever queued, if capped
+        self.puzzles = [[] for _ in self.bands]
+        self.pending = [0 for _ in self.bands]
+        self.failures = [0 for _ in self.bands] # Failed generations in a row per band
+        self.errors = [None for _ in self.bands] # Last generation error per band, e.g. a SearchTimeout
+        self.workers_pool = None
+        self.lock = threading.Lock()
+
+    def start(self): # Loads leftovers from the last session and starts filling the pool
+        for entry in load_pool(self.size):
+            band = self.band_for(entry["difficulty"])
+            if band is not None:
+                self.puzzles[band].append(entry)
+        if self.per_band > 0 and self.workers > 0:
+            # Spawned workers do not inherit the Tk interpreter state of the parent
+            self.workers_pool = multiprocessing.get_context("spawn").Pool(self.workers)
+        for band in range(len(self.bands)):
+            self.refill(band)
+
+    def band_for(self, difficulty): # Returns the index of the band containing difficulty, or None
+        for index, (low, high) in enumerate(self.bands):
+            if low <= difficulty <= high:
+                return index
+        return None
+
+    def refill(self, band, difficulty=None): # Queues generation until the band holds per_band puzzles
+        if self.workers_pool is None:
+            return
+        low, high = self.bands[band]
+        with self.lock:
+            while len(self.puzzles[band]) + self.pending[band] < self.per_band:
+                target = difficulty if difficulty is not None else random.randint(low, high)
+                if self.max_difficulty is not None:
+                    target = min(target, self.max_difficulty)
+                self.pending[band] += 1
+                self.workers_pool.apply_async(
+                    generate_puzzle, (self.size, target, self.timeout),
+                    callback=lambda entry, band=band: self._on_done(band, entry),
+                    error_callback=lambda error, band=band: self._on_failed(band, error),
+                )
+
+    def _on_done(self, band, entry): # Runs on the pool's result thread when a worker finishes
+        with self.lock:
+            self.pending[band] -= 1
+            self.puzzles[band].append(entry)
+            self.failures[band] = 0
+
+    def _on_failed(self, band, error): # Runs on the pool's result thread when a worker raises or times out
+        with self.lock:
+            self.pending[band] -= 1
+            self.failures[band] += 1
+            self.errors[band] = error
+            retry = self.failures[band] < POOL_RETRIES
+        # A band that keeps failing is not retried until a take() asks for it again
+        if retry:
+            self.refill(band)
+
+    def take(self, difficulty): # Returns (puzzle Board, its difficulty, generation stats dict or None) closest to difficulty in its band, or None
+        band = self.band_for(difficulty)
+        if band is None:
+            return None
+        with self.lock:
+            entries = self.puzzles[band]
+            if not entries:
+                entry = None
+            else:
+                entry = min(entries, key=lambda e: abs(e["difficulty"] - difficulty))
+                entries.remove(entry)
+        # Refill towards the difficulty the player actually asked for
+        self.refill(band, difficulty)
+        if entry is None:
+            return None
+        return Board.from_grid(entry["grid"], entry["solution"]), entry["difficulty"], entry.get("stats")
+
+    def shutdown(self): # Stops the workers and saves the puzzles that are ready
+        if self.workers_pool is not None:
+            # Puzzles still being generated are abandoned rather than waited for
+            self.workers_pool.terminate()
+            self.workers_pool = None
+        with self.lock:
+            leftovers = [entry for entries in self.puzzles for entry in entries]
+        save_pool(self.size, leftovers)
@@ -4,11 +4,12 @@ from typing import Any
 
 SAVE_PATH = Path("savegame.json")
 SETTINGS_PATH = Path("settings.json")
+POOL_PATH = Path("puzzle_pool.json")
 
 def save_state(board, fixed, difficulty: int, hardcore: bool):
     state = {
         "size": board.size,
-        "grid": board.grid,
+        "grid": board.grid.to_list(),
         "fixed": fixed,
         "solution": board.solution_grid,
         "difficulty": difficulty,
@@ -31,4 +32,17 @@ def load_settings():
     if not SETTINGS_PATH.exists():
         return None
     with SETTINGS_PATH.open() as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+def save_pool(size: int, puzzles: list) -> None:
+    with POOL_PATH.open("w") as f:
+        json.dump({"size": size, "puzzles": puzzles}, f)
+
+def load_pool(size: int) -> list:
+    if not POOL_PATH.exists():
+        return []
+    with POOL_PATH.open() as f:
+        data = json.load(f)
+    if data.get("size") != size:
+        return []
+    return data.get("puzzles", [])
@@ -3,8 +3,20 @@ from save import load_settings
 
 # Game Settings
 GRID_SIZE = 16
-MAX_DIFFICULTY = 60 # Percentage of empty cells. Practical limit is around 55-60, higher difficulty will result in excessive generation times.
+GRID_SIZES = [9, 16, 25, 36, 49, 64]
+MAX_DIFFICULTY = 62 # Percentage of empty cells. Removing clues one at a time on a 16x16 board rarely gets past 63-65% while staying unique.
 MIN_DIFFICULTY = 1
+# Practical difficulty cap per grid size: beyond these, proving a puzzle unique takes minutes
+SIZE_MAX_DIFFICULTY = {9: 70, 16: 62, 25: 50, 36: 45, 49: 40, 64: 35}
+
+# Puzzle pool
+POOL_SIZE = 3 # Ready-made puzzles kept per difficulty band
+POOL_WORKERS = 2 # Background processes generating puzzles
+GENERATION_TIMEOUT = 120 # Seconds before generating one puzzle is abandoned, 0 for no limit
+DIFFICULTY_BANDS = [[1, 20], [21, 40], [41, 50], [51, 56], [57, 62]] # Inclusive ranges of difficulty, one pool each
+
+# Debugging
+DEBUG_PANEL = False # Show solver statistics for the current puzzle below the board
 
 # Colors
 BACKGROUND_COLOR = "lightgray"
@@ -35,6 +47,11 @@ class SettingsDict(TypedDict):
     grid_size: int
     max_difficulty: int
     min_difficulty: int
+    pool_size: int
+    pool_workers: int
+    generation_timeout: int
+    difficulty_bands: list[list[int]]
+    debug_panel: bool
     background_color: str
     label_color: str
     empty_cell_color: str
@@ -57,42 +74,23 @@ class SettingsDict(TypedDict):
     font_options: list[str]
 
 def get_settings() -> SettingsDict:
+    # Start from the defaults so settings files saved by older versions pick up new keys
+    settings = set_default_settings()
     loaded = load_settings()
     if loaded is not None:
-        return loaded  # type: ignore
-    else:
-        settings: SettingsDict = {
-            "grid_size": GRID_SIZE,
-            "max_difficulty": MAX_DIFFICULTY,
-            "min_difficulty": MIN_DIFFICULTY,
-            "background_color": BACKGROUND_COLOR,
-            "label_color": LABEL_COLOR,
-            "empty_cell_color": EMPTY_CELL_COLOR,
-            "fixed_cell_color": FIXED_CELL_COLOR,
-            "highlight_color": HIGHLIGHT_COLOR,
-            "fill_cell_color": FILL_CELL_COLOR,
-            "error_color": ERROR_COLOR,
-            "border_color": BORDER_COLOR,
-            "start_button_color": START_BUTTON_COLOR,
-            "quit_button_color": QUIT_BUTTON_COLOR,
-            "fill_button_color": FILL_BUTTON_COLOR,
-            "hint_button_color": HINT_BUTTON_COLOR,
-            "restart_button_color": RESTART_BUTTON_COLOR,
-            "text_color_1": TEXT_COLOR_1,
-            "text_color_2": TEXT_COLOR_2,
-            "font": FONT,
-            "cell_font_size": CELL_FONT_SIZE,
-            "button_font_size": BUTTON_FONT_SIZE,
-            "title_font_size": TITLE_FONT_SIZE,
-            "font_options": FONT_OPTIONS
-        }
-        return settings
+        settings.update(loaded)  # type: ignore
+    return settings
     
 def set_default_settings() -> SettingsDict:
     settings: SettingsDict = {
         "grid_size": GRID_SIZE,
         "max_difficulty": MAX_DIFFICULTY,
         "min_difficulty": MIN_DIFFICULTY,
+        "pool_size": POOL_SIZE,
+        "pool_workers": POOL_WORKERS,
+        "generation_timeout": GENERATION_TIMEOUT,
+        "difficulty_bands": [band[:] for band in DIFFICULTY_BANDS],
+        "debug_panel": DEBUG_PANEL,
         "background_color": BACKGROUND_COLOR,
         "label_color": LABEL_COLOR,
         "empty_cell_color": EMPTY_CELL_COLOR,
@@ -1,124 +1,567 @@
-import math, random
+import contextlib, math, random, threading, time
+from dlx import dlx_solve, dlx_count_solutions
 
+# Search engines selectable by solve, solution_is_unique and get_unique_solution
+ENGINES = ("backtrack", "dlx")
 
-def candidate_mask(board, row, col):
-    box = (row // board.box_width) * board.box_width + (col // board.box_width)
-    return board.full_mask & ~(board.rows_mask[row] | board.cols_mask[col] | board.boxes_mask[box])
+# Restart policies for randomized solves: backtrack budgets follow the Luby sequence (1 1 2 1 1 2 4 ...)
+# or grow by RESTART_GROWTH per attempt, in units of restart_backtracks
+RESTART_POLICIES = ("luby", "geometric")
+RESTART_GROWTH = 1.5
+RESTART_UNIT_PER_SIDE = 32 # Default restart_backtracks per row of the board, above what most fills need
 
 
-def propagate(board):
-    """Apply naked-single propagation repeatedly. Returns False on contradiction."""
+class SearchCancelled(Exception):
+    """Raised out of a search whose SearchControl has been cancelled."""
+
+
+class SearchTimeout(SearchCancelled):
+    """Raised out of a search whose SearchControl deadline has passed. Code that only cares that
+    the search stopped early can catch SearchCancelled for both."""
+
+
+class SearchControl:
+    """Shared between a running search and the code supervising it, possibly on another thread.
+    Counts the search nodes visited for progress reporting and lets the search be cancelled.
+    Given a timeout in seconds, the search also stops with SearchTimeout once that much time
+    has passed since the control was created. Every entry point in solver.py, Board.generate_random
+    and the parallel searches accept one as control."""
+
+    def __init__(self, timeout=None):
+        self.nodes = 0
+        self.cancelled = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def tick(self): # Called once per search node
+        self.nodes += 1
+        if self.cancelled.is_set():
+            raise SearchCancelled()
+        # A clock read costs well under a microsecond, against tens of microseconds (up to tenths
+        # of a second on 64x64 boards) per node, so a deadline is missed by at most one node
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchTimeout()
+
+    def backtrack(self): # Called once per guess undone
+        pass
+
+    def check(self): # Raises like tick without counting a node, e.g. while waiting on other processes
+        if self.cancelled.is_set():
+            raise SearchCancelled()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchTimeout()
+
+
+class BudgetExceeded(Exception):
+    """Raised out of a search that has used up the budget of its BudgetControl or RestartControl."""
+
+
+class BudgetControl(SearchControl):
+    """Search control that gives up after budget nodes, while still ticking an outer control
+    so it can cancel the search and keep counting progress."""
+
+    def __init__(self, control, budget):
+        super().__init__()
+        self.outer = control
+        self.budget = budget
+
+    def tick(self):
+        if self.outer is not None:
+            self.outer.tick()
+        self.nodes += 1
+        if self.nodes > self.budget:
+            raise BudgetExceeded()
+
+    def backtrack(self):
+        if self.outer is not None:
+            self.outer.backtrack()
+
+
+class RestartControl(SearchControl):
+    """Search control that gives up after budget backtracks, for restarts. Backtracks rather than
+    nodes measure how lost a search is: a fill that is going well takes one node per guess and
+    barely backtracks, however large the board."""
+
+    def __init__(self, control, budget):
+        super().__init__()
+        self.outer = control
+        self.budget = budget
+        self.backtracks = 0
+
+    def tick(self):
+        if self.outer is not None:
+            self.outer.tick()
+        self.nodes += 1
+
+    def backtrack(self):
+        if self.outer is not None:
+            self.outer.backtrack()
+        self.backtracks += 1
+        if self.backtracks > self.budget:
+            raise BudgetExceeded()
+
+
+class SolveStats:
+    """Optional instrumentation filled in by the solver entry points. Counts search nodes,
+    backtracks (guesses undone), the deepest guess level, propagation passes, cells forced by
+    propagation, uniqueness checks and retries (removals undone) during generation, and
+    randomized solves abandoned for a restart.
+    phase_times holds seconds per entry point; phases nest, so a phase includes any it calls.
+    hook, if given, is called with the stats every hook_every nodes to sample long searches."""
+
+    def __init__(self, hook=None, hook_every=1000):
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.propagation_passes = 0
+        self.cells_forced = 0
+        self.uniqueness_checks = 0
+        self.retries = 0
+        self.restarts = 0
+        self.phase_times = {}
+        self.hook = hook
+        self.hook_every = hook_every
+
+    def node(self, depth): # Called once per search node at the given guess depth
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.hook is not None and self.nodes % self.hook_every == 0:
+            self.hook(self)
+
+    @contextlib.contextmanager
+    def phase(self, name): # Adds the time spent inside the block to phase_times[name]
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self): # Plain dict of the counters, e.g. for JSON or to send between processes
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "propagation_passes": self.propagation_passes,
+            "cells_forced": self.cells_forced,
+            "uniqueness_checks": self.uniqueness_checks,
+            "retries": self.retries,
+            "restarts": self.restarts,
+            "phase_times": dict(self.phase_times),
+        }
+
+    def summary(self): # One-line description of the counters
+        return format_stats(self.as_dict())
+
+
+def format_stats(stats): # One-line description of a SolveStats.as_dict() dict
+    counters = " ".join(f"{key}={value}" for key, value in stats.items() if key != "phase_times")
+    phases = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in stats["phase_times"].items())
+    return f"{counters} {phases}".strip()
+
+
+def _phase(stats, name): # stats.phase(name), or a no-op when no stats are being collected
+    return stats.phase(name) if stats is not None else contextlib.nullcontext()
+
+
+def hidden_singles(board):
+    """Places every digit that has only one possible cell left in some row, column or box.
+    Returns the number of placements, or None on contradiction."""
     n = board.size
-    made_progress = True
-    while made_progress:
-        made_progress = False
-        for r in range(n):
-            for c in range(n):
-                if board.grid[r][c] is None:
-                    mask = candidate_mask(board, r, c)
-                    if mask == 0:
-                        return False
-                    # single candidate
-                    if mask & (mask - 1) == 0:
-                        num = mask.bit_length() - 1
-                        board.set_value(r, c, num)
-                        made_progress = True
-    return True
+    cand = board.cand
+    placed_masks = (board.rows_mask, board.cols_mask, board.boxes_mask)
+    placed = 0
+    for u, unit in enumerate(board.units):
+        once = twice = 0
+        for i in unit:
+            mask = cand[i]
+            twice |= once & mask
+            once |= mask
+        if (once | placed_masks[u // n][u % n]) != board.full_mask:
+            return None # Some digit can no longer be placed in this unit
+        only = once & ~twice
+        if not only:
+            continue
+        for i in unit:
+            mask = cand[i] & only
+            if mask:
+                if mask & (mask - 1):
+                    return None # One cell is the only home of two digits
+                board.set_value(i // n, i % n, mask.bit_length() - 1)
+                placed += 1
+    return placed
 
 
-def solve(board, randomized=False):
-    """Backtracking solver with propagation and MRV heuristic.
-    Returns True if solved, False otherwise."""
-    # First apply deterministic propagation
-    if not propagate(board):
-        return False
-
-    # If solved
-    row, col = first_empty_cell(board)
-    if (row, col) == (-1, -1):
-        return True # No empty cells left, board is solved
-
-    # Choose MRV cell
-    row, col = best_empty_cell(board)
-    mask = candidate_mask(board, row, col)
-    # Build candidate list; shuffle if randomized
-    candidates = []
-    while mask:
-        lowbit = mask & -mask
-        num = lowbit.bit_length() - 1
-        candidates.append(num)
-        mask &= mask - 1
-    if randomized:
-        random.shuffle(candidates)
-
-    for num in candidates:
-        board.set_value(row, col, num)
-        if solve(board, randomized=randomized):
+def locked_candidates(board):
+    """Pointing and claiming: when a digit's candidates in a box lie in one row or column,
+    removes it from the rest of that line, and when a digit's candidates in a line lie in one
+    box, removes it from the rest of that box. Returns the number of cells changed."""
+    cand = board.cand
+    changed = 0
+    for seg, line_rest, box_rest in board.segments:
+        mask = 0
+        for i in seg:
+            mask |= cand[i]
+        if not mask:
+            continue
+        line_mask = box_mask = 0
+        for i in line_rest:
+            line_mask |= cand[i]
+        for i in box_rest:
+            box_mask |= cand[i]
+        pointing = mask & ~box_mask
+        if pointing & line_mask:
+            for i in line_rest:
+                changed += board.remove_candidates(i, pointing)
+        claiming = mask & ~line_mask
+        if claiming & box_mask:
+            for i in box_rest:
+                changed += board.remove_candidates(i, claiming)
+    return changed
+
+
+def naked_pairs(board):
+    """When two cells of a unit share the same two candidates, removes those digits from the
+    other cells of the unit. Returns the number of cells changed."""
+    cand = board.cand
+    changed = 0
+    for unit in board.units:
+        seen = {}
+        for i in unit:
+            mask = cand[i]
+            if mask.bit_count() != 2:
+                continue
+            if mask not in seen:
+                seen[mask] = i
+                continue
+            first = seen[mask]
+            for j in unit:
+                if j != i and j != first:
+                    changed += board.remove_candidates(j, mask)
+    return changed
+
+
+def hidden_pairs(board):
+    """When two digits can only go in the same two cells of a unit, removes every other
+    candidate from those cells. Returns the number of cells changed."""
+    cand = board.cand
+    changed = 0
+    for unit in board.units:
+        # Bitmask of unit positions for each digit
+        positions = {}
+        for k, i in enumerate(unit):
+            mask = cand[i]
+            while mask:
+                lowbit = mask & -mask
+                positions[lowbit] = positions.get(lowbit, 0) | (1 << k)
+                mask ^= lowbit
+        seen = {}
+        for digit, where in positions.items():
+            if where.bit_count() != 2:
+                continue
+            if where not in seen:
+                seen[where] = digit
+                continue
+            keep = digit | seen[where]
+            while where:
+                lowbit = where & -where
+                changed += board.remove_candidates(unit[lowbit.bit_length() - 1], ~keep)
+                where ^= lowbit
+    return changed
+
+
+# Deduction techniques run by propagate once naked singles are exhausted, cheapest first
+TECHNIQUES = {
+    "hidden_singles": hidden_singles,
+    "locked_candidates": locked_candidates,
+    "naked_pairs": naked_pairs,
+    "hidden_pairs": hidden_pairs,
+}
+DEFAULT_TECHNIQUES = tuple(TECHNIQUES)
+# Filling a blank grid almost never needs more than singles, so the costlier techniques only slow it down
+FILL_TECHNIQUES = ("hidden_singles",)
+
+
+def propagate(board, techniques=DEFAULT_TECHNIQUES, stats=None):
+    """Apply naked-single propagation until no forced cells remain, then the enabled
+    techniques from TECHNIQUES in order, going back to singles whenever one makes
+    progress. Returns False on contradiction.
+    Placing a value only updates the candidates of its row, column and box peers, so the cells
+    that become forced are exactly the peers that drop into buckets[1]. That bucket is the work
+    queue, and buckets[0] collects any cell left without candidates."""
+    if stats is None:
+        return _propagate(board, techniques, None)
+    filled = board.filled
+    try:
+        return _propagate(board, techniques, stats)
+    finally:
+        stats.cells_forced += board.filled - filled
+
+def _propagate(board, techniques, stats):
+    n = board.size
+    cand = board.cand
+    contradictions = board.buckets[0]
+    singles = board.buckets[1]
+    while True:
+        if stats is not None:
+            stats.propagation_passes += 1
+        while singles:
+            if contradictions:
+                return False
+            i = singles.pop()
+            board.set_value(i // n, i % n, cand[i].bit_length() - 1)
+        if contradictions:
+            return False
+        if not board.empty:
+            return True
+
+        for name in techniques:
+            changed = TECHNIQUES[name](board)
+            if changed is None or contradictions:
+                return False
+            if changed:
+                break
+        else:
             return True
-        board.set_value(row, col, None)
-    return False
-
-def solution_is_unique(board): # Counts the number of solutions for the current board
-    board.num_solutions = 0
-
-    def backtrack():
-        if board.num_solutions > 1:
-            return False  # Early exit if more than one solution found
-
-        row, col = best_empty_cell(board)
-        if (row, col) == (-1, -1):
-            board.num_solutions += 1
-            return board.num_solutions <= 1  # Continue only if max solutions not exceeded
-        # iterate candidate bits using board masks for speed
-        box = (row // board.box_width) * board.box_width + (col // board.box_width)
-        candidate_mask = board.full_mask & ~(board.rows_mask[row] | board.cols_mask[col] | board.boxes_mask[box])
-        while candidate_mask:
-            lowbit = candidate_mask & -candidate_mask
-            num = lowbit.bit_length() - 1
-            board.set_value(row, col, num)
-            continue_search = backtrack()
-            board.set_value(row, col, None)
-            if not continue_search:
+
+
+def solve(board, randomized=False, engine="backtrack", techniques=DEFAULT_TECHNIQUES, control=None, stats=None, restarts=None, restart_backtracks=None, portfolio=None):
+    """Backtracking solver with propagation and MRV heuristic.
+    Returns True if solved, False otherwise. The board is left unchanged when unsolvable
+    or when the search is cancelled through control, which raises SearchCancelled, or runs past
+    the control's timeout, which raises SearchTimeout.
+    A SolveStats passed as stats is filled in with counters and the "solve" phase time.
+    restarts, one of RESTART_POLICIES, makes a randomized solve give up on a guess order once
+    it has undone more guesses than its budget and start again with a fresh one, which cuts off
+    the rare runs that wander into huge subtrees. Budgets are in units of restart_backtracks, by
+    default RESTART_UNIT_PER_SIDE per row, and each restart is counted in stats.restarts.
+    A parallel.Portfolio passed as portfolio races its differently seeded solvers on the board
+    in its worker processes instead, and its own members decide engine and restarts."""
+    with _phase(stats, "solve"):
+        if portfolio is not None:
+            return portfolio.solve(board, techniques, control, stats)
+        if restarts is None:
+            return _solve(board, randomized, engine, techniques, control, stats)
+        if restarts not in RESTART_POLICIES:
+            raise ValueError(f"Unknown restart policy {restarts!r}, expected one of {RESTART_POLICIES}")
+        if not randomized:
+            raise ValueError("restarts need a randomized solve, a fixed guess order would repeat the same search")
+        for budget in restart_budgets(restarts, restart_backtracks or RESTART_UNIT_PER_SIDE * board.size):
+            try:
+                return _solve(board, True, engine, techniques, RestartControl(control, budget), stats)
+            except BudgetExceeded:
+                if stats is not None:
+                    stats.restarts += 1
+
+def _solve(board, randomized, engine, techniques, control, stats):
+    if engine == "dlx":
+        return dlx_solve(board, randomized=randomized, control=control, stats=stats)
+    check_engine(engine)
+    check_techniques(techniques)
+
+    mark = board.checkpoint()
+    solved = False
+    try:
+        solved = _search(board, randomized, techniques, lambda board: True, control, stats)
+    finally:
+        if not solved:
+            board.rollback(mark)
+        board.release(mark)
+    return solved
+
+def restart_budgets(policy, unit): # Endless backtrack budgets for successive attempts under a restart policy
+    attempt = 1
+    while True:
+        if policy == "luby":
+            yield unit * luby(attempt)
+        else:
+            yield int(unit * RESTART_GROWTH ** (attempt - 1))
+        attempt += 1
+
+def luby(i): # i-th term, from 1, of the Luby sequence 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ...
+    while True:
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+def count_solutions(board, limit=2, return_solutions=False, engine="backtrack", techniques=DEFAULT_TECHNIQUES, control=None, stats=None, parallel=None,
+                    portfolio=None):
+    """Counts the solutions of the board, stopping once limit have been found.
+    Returns the count, or (count, solutions) with the first two distinct solved grids
+    when return_solutions is set. The caller's board is never modified.
+    A parallel.ParallelSearch passed as parallel spreads hard backtracking counts over its
+    worker processes; it is not used for DLX or when solutions are returned. A parallel.Portfolio
+    passed as portfolio instead races differently seeded counts, keeping the first to finish.
+    """
+    with _phase(stats, "count"):
+        if portfolio is not None and not return_solutions:
+            return portfolio.count_solutions(board, limit, techniques, control, stats)
+        if parallel is not None and engine == "backtrack" and not return_solutions:
+            return parallel.count_solutions(board, limit, control=control, stats=stats)
+        return _count_solutions(board, limit, return_solutions, engine, techniques, control, stats)
+
+def _count_solutions(board, limit, return_solutions, engine, techniques, control, stats):
+    if engine == "dlx":
+        return dlx_count_solutions(board, limit=limit, return_solutions=return_solutions, control=control, stats=stats)
+    check_engine(engine)
+    check_techniques(techniques)
+
+    count = 0
+    solutions = []
+
+    def on_solution(solved):
+        nonlocal count
+        count += 1
+        if return_solutions and len(solutions) < 2:
+            solutions.append(solved.grid.to_list())
+        return count >= limit  # Stop once the limit is reached
+
+    _search(board.board_copy(), False, techniques, on_solution, control, stats)
+    if return_solutions:
+        return count, solutions
+    return count
+
+def _search(board, randomized, techniques, on_solution, control=None, stats=None, depth=0):
+    """Propagating backtracking search shared by solve and count_solutions, working on the
+    board's trail. Calls on_solution with the solved board at each solution, and stops as soon
+    as it returns True, leaving the board at that solution. Returns True if stopped.
+    depth counts the guesses made above the starting node.
+    Open guesses live on an explicit stack rather than the call stack, so the search can go as
+    deep as the board needs (thousands of guesses filling a blank 64x64 board) without hitting
+    the recursion limit, and each one costs only its cell, untried digits and trail mark."""
+    stack = [] # (row, col, untried digits, trail mark) of each open guess, innermost last
+    while True:
+        if control is not None:
+            control.tick()
+        if stats is not None:
+            stats.node(depth + len(stack))
+
+        # First apply deterministic propagation, then guess on the MRV cell if that was not enough
+        guessed = False
+        if propagate(board, techniques, stats):
+            if not board.empty:
+                if on_solution(board): # No empty cells left, board is solved
+                    return True
+            else:
+                row, col = best_empty_cell(board)
+                mask = board.cand[row * board.size + col]
+                candidates = []
+                while mask:
+                    lowbit = mask & -mask
+                    candidates.append(lowbit.bit_length() - 1)
+                    mask &= mask - 1
+                if randomized:
+                    random.shuffle(candidates)
+                candidates.reverse() # Taken from the end, so the first is tried first
+                # Rolling back to the mark also undoes everything propagation deduced under a failed guess
+                stack.append((row, col, candidates, board.checkpoint()))
+                guessed = True
+
+        if not guessed:
+            # This node failed, or its solution has been counted: undo it back to the guess that led here
+            if not stack:
+                return False
+            board.rollback(stack[-1][3])
+            if control is not None:
+                control.backtrack()
+            if stats is not None:
+                stats.backtracks += 1
+        while not stack[-1][2]:
+            # Every digit of the innermost guess failed, so the node that made it fails as well
+            stack.pop()
+            if not stack:
                 return False
-            candidate_mask &= candidate_mask - 1
-        return True
+            board.rollback(stack[-1][3])
+            if control is not None:
+                control.backtrack()
+            if stats is not None:
+                stats.backtracks += 1
+        row, col, candidates, mark = stack[-1]
+        board.set_value(row, col, candidates.pop())
 
-    backtrack()
+def solution_is_unique(board, engine="backtrack", techniques=DEFAULT_TECHNIQUES, control=None, stats=None, parallel=None, portfolio=None): # Checks whether the board has exactly one solution
+    board.num_solutions = count_solutions(board, limit=2, engine=engine, techniques=techniques, control=control, stats=stats, parallel=parallel,
+                                          portfolio=portfolio)
     return board.num_solutions == 1
 
-def get_unique_solution(board, percent_unfill): # Returns the unique solution if it exists
-    unique_solution_board = board.board_copy()
-    unique_solution_board.unfill_cells(percent_unfill)
+def get_unique_solution(board, percent_unfill, engine="backtrack", control=None, stats=None, parallel=None): # Returns a uniquely solvable puzzle dug out of a solved board
+    """Removes clues from a copy of the solved board one at a time in random order, keeping a
+    removal only if the puzzle still has a single solution, until exactly percent_unfill percent
+    of the cells are empty. If every cell has been tried first, the puzzle is returned with as
+    many cells emptied as uniqueness allows. stats records the checks and the removals that had
+    to be put back (retries) under the "dig" phase. parallel, a parallel.ParallelSearch, spreads
+    the hard uniqueness checks of the backtracking engine over its workers."""
+    with _phase(stats, "dig"):
+        return _dig(board, percent_unfill, engine, control, stats, parallel)
+
+def _dig(board, percent_unfill, engine, control, stats, parallel):
+    n = board.size
+    target = int(n * n * percent_unfill / 100)
+    puzzle = board.board_copy()
+    order = [i for i in range(n * n) if i not in puzzle.empty]
+    random.shuffle(order)
 
-    while not solution_is_unique(unique_solution_board):
-        unique_solution_board = board.board_copy()
-        unique_solution_board.unfill_cells(percent_unfill)
-        percent_unfill = max(percent_unfill - 1, 1)  # Decrease unfill percentage to try again
+    # The puzzle board is carried from step to step, so its candidate table is never rebuilt
+    removed = len(puzzle.empty)
+    for i in order:
+        if removed >= target:
+            break
+        row, col = divmod(i, n)
+        value = puzzle.cells[i]
+        puzzle.set_value(row, col, None)
+        if stats is not None:
+            stats.uniqueness_checks += 1
+        if _has_other_solution(puzzle, i, value, engine, control, stats, parallel):
+            puzzle.set_value(row, col, value)
+            if stats is not None:
+                stats.retries += 1
+        else:
+            removed += 1
+    return puzzle
 
-    return unique_solution_board
+def _has_other_solution(puzzle, i, value, engine, control=None, stats=None, parallel=None):
+    """Checks whether a puzzle that was unique before cell i (holding value) was emptied now has
+    another solution. Any other solution must put a different digit in cell i, so it is enough to
+    forbid value there and look for a single solution, which is then rolled back."""
+    if engine == "dlx":
+        return dlx_count_solutions(puzzle, limit=2, control=control, stats=stats) > 1
+    check_engine(engine)
+    if parallel is not None:
+        return parallel.count_solutions(puzzle, limit=1, exclusions=[(i, 1 << value)], control=control, stats=stats) > 0
+    mark = puzzle.checkpoint()
+    try:
+        puzzle.remove_candidates(i, 1 << value)
+        return _search(puzzle, False, DEFAULT_TECHNIQUES, lambda board: True, control, stats)
+    finally:
+        puzzle.rollback(mark)
+        puzzle.release(mark)
+
+def check_engine(engine): # Raises if the engine name is not recognised
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown solver engine {engine!r}, expected one of {ENGINES}")
+
+def check_techniques(techniques): # Raises if a propagation technique name is not recognised
+    for name in techniques:
+        if name not in TECHNIQUES:
+            raise ValueError(f"Unknown propagation technique {name!r}, expected some of {tuple(TECHNIQUES)}")
 
 def first_empty_cell(board): # Finds the first empty cell in the board and returns its coordinates
-    for row in range(len(board.grid)):
-        for col in range(len(board.grid[row])):
-            if board.grid[row][col] is None:
-                return (row, col)
-    return (-1, -1)
+    if not board.empty:
+        return (-1, -1)
+    return divmod(min(board.empty), board.size)
 
 def best_empty_cell(board): # Finds the empty cell with the fewest valid candidates
-    min_candidates = float('inf')
-    best_cell = (-1, -1)
-    for row in range(len(board.grid)):
-        for col in range(len(board.grid[row])):
-            if board.grid[row][col] is None:
-                box = (row // board.box_width) * board.box_width + (col // board.box_width)
-                candidate_mask = board.full_mask & ~(board.rows_mask[row] | board.cols_mask[col] | board.boxes_mask[box])
-                count = candidate_mask.bit_count()
-                if count < min_candidates:
-                    min_candidates = count
-                    best_cell = (row, col)
-                    if min_candidates == 1:
-                        return best_cell  # Early exit if only one candidate, already optimal
-    return best_cell
+    # buckets[k] holds the empty cells with k candidates, so the first non-empty bucket
+    # gives the minimum remaining values; ties go to the first cell in row-major order
+    for bucket in board.buckets:
+        if bucket:
+            return divmod(min(bucket), board.size)
+    return (-1, -1)
 
 def check_num_is_valid(self, row, col, num): # Checks if a number can be placed in a cell
     old = self.grid[row][col] # Save old value
@@ -161,13 +604,16 @@ def check_col_is_valid(board, row, col, num): # Checks the column
     return True
 
 # Conversion utilities
-HEX_CHARS = '0123456789ABCDEF'
+# Digits, then upper case, then lower case letters, then two symbols: 64 in all, enough for 64x64 boards.
+# Boards up to 36x36 only need digits and upper case letters, so their input is case-insensitive.
+SYMBOLS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz@#'
+HEX_CHARS = SYMBOLS[:16]
+CASE_INSENSITIVE_SIZE = 36
 
-def char_to_num(char): # Converts character to number
-    if char.isdigit():
-        return int(char)
-    else:
-        return HEX_CHARS.index(char.upper())
+def char_to_num(char, size=16): # Converts character to number
+    if size <= CASE_INSENSITIVE_SIZE:
+        char = char.upper()
+    return SYMBOLS.index(char)
 
 def num_to_char(num): # Converts number to character
-    return HEX_CHARS[num]
\ No newline at end of file
+    return SYMBOLS[num]